@@ -1,2 +1,4 @@
 from.search import Search
-from.get_article import GetArticle  
\ No newline at end of file
+from.get_article import GetArticle
+from.get_articles import GetArticles
+from.full_text import GetFullText
@@ -0,0 +1,122 @@
+from xml.etree.ElementTree import XMLPullParser
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+ARXIV = "{http://arxiv.org/schemas/atom}"
+OPENSEARCH = "{http://a9.com/-/spec/opensearch/1.1/}"
+
+FIELDS = ("id", "version", "title", "authors", "published", "updated", "categories", "primary_category",
+          "summary", "comment", "journal_ref", "doi", "pdf_url")
+DEFAULT_FIELDS = ("id", "title", "authors", "published", "categories", "summary")
+
+ABS_PREFIX = "arxiv.org/abs/"
+
+
+def _text(elem, tag):
+    child = elem.find(tag)
+    if child is None or child.text is None:
+        return None
+    return " ".join(child.text.split())
+
+
+def split_id(entry_id):
+    """Split an entry id or abs URL into ``(arxiv_id, version)``, e.g. ``("1904.11655", "v1")``."""
+    if ABS_PREFIX in entry_id:
+        entry_id = entry_id.split(ABS_PREFIX, 1)[1]
+    base, sep, version = entry_id.rpartition("v")
+    if sep and base and version.isdigit():
+        return base, f"v{version}"
+    return entry_id, None
+
+
+class AtomParser:
+    """Incremental parser for arXiv Atom feeds.
+
+    Bytes are fed in chunks as they arrive; every completed ``<entry>`` is
+    turned into a flat record holding only ``fields`` and then dropped from the
+    tree, so memory stays bounded by one entry no matter how large the feed is.
+    ``summary`` is cut to ``abstract_chars`` characters (``None`` keeps it whole).
+    The feed's ``opensearch:totalResults`` is kept in ``total_results``.
+    """
+
+    def __init__(self, fields=DEFAULT_FIELDS, abstract_chars=500):
+        unknown = set(fields) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown arXiv record fields {sorted(unknown)}; expected some of {FIELDS}")
+        self.fields = tuple(fields)
+        self.abstract_chars = abstract_chars
+        self.total_results = None
+        self._parser = XMLPullParser(events=("start", "end"))
+        self._root = None
+
+    def feed(self, data):
+        """Feed a chunk of the response and return the records it completed."""
+        self._parser.feed(data)
+        return self._drain()
+
+    def close(self):
+        self._parser.close()
+        return self._drain()
+
+    def _drain(self):
+        records = []
+        for event, elem in self._parser.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = elem
+                continue
+            if elem.tag == f"{OPENSEARCH}totalResults" and elem.text:
+                self.total_results = int(elem.text)
+            elif elem.tag == f"{ATOM}entry":
+                records.append(self._record(elem))
+                self._root.remove(elem)
+        return records
+
+    def _record(self, entry):
+        arxiv_id, version = split_id(_text(entry, f"{ATOM}id") or "")
+        values = {"id": arxiv_id, "version": version}
+        for field in self.fields:
+            if field in values:
+                continue
+            if field == "title":
+                values[field] = _text(entry, f"{ATOM}title")
+            elif field == "authors":
+                values[field] = [_text(author, f"{ATOM}name") for author in entry.findall(f"{ATOM}author")]
+            elif field in ("published", "updated"):
+                values[field] = _text(entry, f"{ATOM}{field}")
+            elif field == "categories":
+                values[field] = [c.get("term") for c in entry.findall(f"{ATOM}category")]
+            elif field == "primary_category":
+                primary = entry.find(f"{ARXIV}primary_category")
+                values[field] = primary.get("term") if primary is not None else None
+            elif field == "summary":
+                summary = _text(entry, f"{ATOM}summary")
+                if summary and self.abstract_chars is not None and len(summary) > self.abstract_chars:
+                    summary = summary[:self.abstract_chars].rstrip() + "..."
+                values[field] = summary
+            elif field in ("comment", "journal_ref", "doi"):
+                values[field] = _text(entry, f"{ARXIV}{field}")
+            elif field == "pdf_url":
+                values[field] = next((link.get("href") for link in entry.findall(f"{ATOM}link")
+                                      if link.get("title") == "pdf"), None)
+        return {field: values[field] for field in self.fields}
+
+
+def project(record, fields=DEFAULT_FIELDS, abstract_chars=500):
+    """Cut a full record (all ``FIELDS``, whole abstract) down to ``fields``."""
+    projected = {field: record.get(field) for field in fields}
+    summary = projected.get("summary")
+    if summary and abstract_chars is not None and len(summary) > abstract_chars:
+        projected["summary"] = summary[:abstract_chars].rstrip() + "..."
+    return projected
+
+
+def parse_feed(chunks, fields=DEFAULT_FIELDS, abstract_chars=500):
+    """Parse an Atom feed given as bytes or an iterable of byte chunks into a list of records."""
+    parser = AtomParser(fields, abstract_chars)
+    if isinstance(chunks, (bytes, str)):
+        chunks = [chunks]
+    records = []
+    for chunk in chunks:
+        records.extend(parser.feed(chunk))
+    records.extend(parser.close())
+    return records
@@ -0,0 +1,266 @@
+from..base import BaseTool
+from ..config import FunctionRegistry
+from .get_article import fetch_articles
+from .loader import id_key
+import logging
+import mmap
+import os
+import threading
+import time
+import uuid
+import zlib
+from pathlib import Path
+
+try:
+    from pypdf import PdfReader
+    _HAS_PYPDF = True
+except ImportError:
+    _HAS_PYPDF = False
+
+logger = logging.getLogger(__name__)
+
+pdf_url = "https://arxiv.org/pdf/"
+source_url = "https://arxiv.org/e-print/"
+
+FORMATS = {"pdf": "pdf", "source": "src"}  # format -> cached file extension
+GZIP_MAGIC = b"\x1f\x8b"
+PDF_TRAILER = b"%%EOF"
+LOCK_STRIPES = 64
+
+
+def parse_pages(pages, page_count):
+    """Turn ``"3"``, ``"2-5"`` or ``"4-"`` (1-based, inclusive) into a ``range`` of page indexes."""
+    first, sep, last = str(pages).partition("-")
+    start = int(first) if first.strip() else 1
+    end = (int(last) if last.strip() else page_count) if sep else start
+    if start < 1 or end < start:
+        raise ValueError(f"Invalid page range {pages!r}")
+    return range(start - 1, min(end, page_count))
+
+
+def read_bytes(path, start=0, end=None):
+    """Read ``[start, end)`` of a file through a read-only memory map."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return mapped[start:end]
+
+
+class FullTextCache:
+    """Content-addressed on-disk cache of arXiv PDFs and sources.
+
+    Files live at ``<root>/<id>/<version>.<pdf|src>``. A versioned file never
+    changes, so once it is on disk it is served without touching the network.
+    For IDs given without a version, the latest version is looked up and
+    remembered in ``<root>/<id>/latest`` for ``latest_ttl`` seconds. Files that
+    are empty, or PDFs without their ``%%EOF`` trailer, count as missing.
+    """
+
+    def __init__(self, root=None, latest_ttl=24 * 60 * 60):
+        self.root = Path(root) if root else Path.home() / ".llama" / "arxiv" / "full_text"
+        self.latest_ttl = latest_ttl
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    def directory(self, arxiv_id):
+        return self.root / arxiv_id.replace("/", "_")
+
+    def path(self, arxiv_id, version, format="pdf"):
+        return self.directory(arxiv_id) / f"{version}.{FORMATS[format]}"
+
+    def latest(self, arxiv_id):
+        """The remembered latest version of ``arxiv_id``, or ``None`` if unknown or stale."""
+        alias = self.directory(arxiv_id) / "latest"
+        try:
+            if time.time() - alias.stat().st_mtime > self.latest_ttl:
+                return None
+            return alias.read_text().strip() or None
+        except OSError:
+            return None
+
+    def set_latest(self, arxiv_id, version):
+        self._write_atomic(self.directory(arxiv_id) / "latest", [version.encode()])
+
+    def lock(self, path):
+        """A striped lock so concurrent readers of one paper share a single download."""
+        return self._locks[hash(path) % LOCK_STRIPES]
+
+    @staticmethod
+    def is_complete(path):
+        """Whether ``path`` holds a whole cached file: non-empty, and PDFs end with their trailer."""
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            return False
+        if size == 0:
+            return False
+        if path.suffix == ".pdf":
+            return PDF_TRAILER in read_bytes(path, max(size - 1024, 0))
+        return True
+
+    @staticmethod
+    def _write_atomic(path, chunks):
+        """Write ``chunks`` to a temporary file next to ``path`` and move it into place."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(f".{path.name}.{uuid.uuid4().hex}.part")
+        size = 0
+        try:
+            with open(partial, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    size += len(chunk)
+            os.replace(partial, path)
+        finally:
+            if partial.exists():
+                partial.unlink()
+        return size
+
+
+def _gunzip_stream(chunks):
+    """Yield ``chunks`` decompressed if they start with a gzip header, unchanged otherwise."""
+    decompressor = None
+    for chunk in chunks:
+        if decompressor is None:
+            if not chunk:
+                continue
+            decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16) if chunk[:2] == GZIP_MAGIC else False
+        if decompressor:
+            chunk = decompressor.decompress(chunk)
+        if chunk:
+            yield chunk
+    if decompressor:
+        tail = decompressor.flush()
+        if tail:
+            yield tail
+
+
+@FunctionRegistry.register
+class GetFullText(BaseTool):
+    chunk_size = 1024 * 1024  # Bytes written to disk per chunk while downloading
+    cache_dir = None  # Defaults to ~/.llama/arxiv/full_text
+
+    def __init__(self, name="get_full_text"):
+        super().__init__()
+        self.name = name
+        self._cache = None
+
+    @property
+    def cache(self) -> FullTextCache:
+        if self._cache is None:
+            self._cache = FullTextCache(self.cache_dir)
+        return self._cache
+
+    @property
+    def definition(self):
+        return {
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "description": "Read the full text of an arXiv article, by page or byte range",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "id": {
+                            "type": "string",
+                            "description": "The ID of the article, optionally with a version (e.g. 1706.03762v7)"
+                        },
+                        "format": {
+                            "type": "string",
+                            "description": "'pdf' for the rendered paper (default) or 'source' for the LaTeX source",
+                            "enum": list(FORMATS),
+                            "default": "pdf"
+                        },
+                        "pages": {
+                            "type": "string",
+                            "description": "PDF pages to extract text from, e.g. '3', '2-5' or '4-' (1-based)"
+                        },
+                        "byte_start": {
+                            "type": "integer",
+                            "description": "Start of a raw byte range to read instead of pages"
+                        },
+                        "byte_end": {
+                            "type": "integer",
+                            "description": "End (exclusive) of a raw byte range to read (default: byte_start + max_chars)"
+                        },
+                        "max_chars": {
+                            "type": "integer",
+                            "description": "Return at most this many characters (default: 20000)"
+                        }
+                    },
+                    "required": ["id"]
+                }
+            }
+        }
+
+    def fetch(self, id, format="pdf"):
+        """Make sure the article is cached on disk; returns ``(path, arxiv_id, version)``."""
+        if format not in FORMATS:
+            raise ValueError(f"Unknown full text format {format!r}; expected one of {tuple(FORMATS)}")
+        arxiv_id, version = id_key(id)
+        if version is None:
+            version = self.cache.latest(arxiv_id)
+        if version is None:
+            records = fetch_articles(self.http, [arxiv_id])
+            if not records or not records[0].get("version"):
+                raise ValueError(f"ArXiv article {id!r} not found")
+            version = records[0]["version"]
+            self.cache.set_latest(arxiv_id, version)
+
+        path = self.cache.path(arxiv_id, version, format)
+        with self.cache.lock(path):
+            if not self.cache.is_complete(path):
+                self._download(arxiv_id, version, format, path)
+                if not self.cache.is_complete(path):
+                    path.unlink(missing_ok=True)
+                    raise ValueError(f"ArXiv returned an incomplete {format} for {arxiv_id}{version}")
+        return path, arxiv_id, version
+
+    def _download(self, arxiv_id, version, format, path):
+        url = (pdf_url if format == "pdf" else source_url) + arxiv_id + version
+        logger.debug("Downloading %s from ArXiv to %s", url, path)
+        with self.http.get(url, stream=True) as response:
+            response.raise_for_status()
+            chunks = response.iter_content(chunk_size=self.chunk_size)
+            size = self.cache._write_atomic(path, _gunzip_stream(chunks) if format == "source" else chunks)
+        logger.info("Cached %d bytes of ArXiv %s %s%s", size, format, arxiv_id, version)
+
+    def _page_text(self, path, pages, max_chars):
+        if not _HAS_PYPDF:
+            raise RuntimeError(
+                "pypdf is not installed or could not be imported. "
+                "Install it or check your environment."
+            )
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            reader = PdfReader(mapped)
+            page_count = len(reader.pages)
+            indexes = parse_pages(pages, page_count) if pages is not None else range(page_count)
+            texts, length, read = [], 0, []
+            for index in indexes:
+                if length >= max_chars:
+                    break
+                text = reader.pages[index].extract_text() or ""
+                texts.append(text)
+                read.append(index + 1)
+                length += len(text) + 2
+            del reader  # Release references into the map before it is closed
+        return "\n\n".join(texts), page_count, read
+
+    def fn(self, id, format="pdf", pages=None, byte_start=None, byte_end=None, max_chars=20000):
+        logger.debug("Reading full text of '%s' from ArXiv", id)
+        path, arxiv_id, version = self.fetch(id, format)
+        result = {
+            "id": arxiv_id,
+            "version": version,
+            "format": format,
+            "size": path.stat().st_size
+        }
+        if format == "pdf" and byte_start is None and byte_end is None:
+            text, result["page_count"], result["pages"] = self._page_text(path, pages, max_chars)
+        else:
+            start = byte_start or 0
+            end = byte_end if byte_end is not None else start + max_chars
+            text = read_bytes(path, start, end).decode("utf-8", errors="replace")
+            result["byte_range"] = [start, max(start, min(end, result["size"]))]
+        result["truncated"] = len(text) > max_chars
+        result["text"] = text[:max_chars]
+        return result
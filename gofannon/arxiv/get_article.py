@@ -1,29 +1,103 @@
 from..base import BaseTool
-import requests
 from ..config import FunctionRegistry
+from .atom import DEFAULT_FIELDS, FIELDS, parse_feed, project
+from .loader import ArticleLoader
 import logging
+import threading
+import weakref
+from requests import HTTPError
 
 logger = logging.getLogger(__name__)
 
+base_url = "http://export.arxiv.org/api/query"
+
+_loaders = weakref.WeakKeyDictionary()  # transport -> {(rate_limiter, window): ArticleLoader}
+_loaders_lock = threading.Lock()
+
+
+def fetch_articles(http, ids):
+    """Fetch full records for ``ids`` with one ``id_list`` query, in arXiv's order."""
+    params = {
+        "id_list": ",".join(ids),
+        "max_results": len(ids)
+    }
+    with http.get(base_url, params=params, stream=True) as response:
+        response.raise_for_status()
+        return parse_feed(response.iter_content(chunk_size=64 * 1024), FIELDS, None)
+
+
+def _rejected_ids(error):
+    """Whether arXiv turned the request itself down (4xx), which one bad ID in a batch can cause."""
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    return isinstance(error, HTTPError) and status is not None and 400 <= status < 500
+
+
+def shared_loader(transport, rate_limiter=None, window=0.01):
+    """The ArticleLoader shared by every lookup through ``transport`` and ``rate_limiter``.
+
+    Tools are often instantiated per call, so the loader lives here rather than
+    on the tool; otherwise concurrent calls would never land in one batch.
+    """
+    with _loaders_lock:
+        loaders = _loaders.setdefault(transport, {})
+        loader = loaders.get((rate_limiter, window))
+        if loader is None:
+            transport_ref = weakref.ref(transport)  # don't keep the transport alive through its own loader
+
+            def fetch_many(ids):
+                if rate_limiter is not None:
+                    rate_limiter.wait()
+                return fetch_articles(transport_ref(), ids)
+
+            loader = loaders[(rate_limiter, window)] = ArticleLoader(fetch_many, window=window,
+                                                                    splittable=_rejected_ids)
+        return loader
+
+
 @FunctionRegistry.register
 class GetArticle(BaseTool):
+    cache_ttl = 24 * 60 * 60
+    batch_window = 0.01  # Seconds a lookup waits to share an id_list query with others; None disables batching
+    rate_limiter = None  # RateLimiter spacing batched id_list queries; None sends them unthrottled
+
     def __init__(self, name="get_article"):
         super().__init__()
         self.name = name
 
+    @property
+    def loader(self) -> ArticleLoader:
+        """Batches concurrent lookups sharing this tool's transport into ``id_list`` queries."""
+        return shared_loader(self.http, self.rate_limiter, self.batch_window)
+
     @property
     def definition(self):
         return {
             "type": "function",
             "function": {
                 "name": self.name,
-                "description": "Get a specific article from arXiv",
+                "description": "Get a specific article from arXiv. Use output='records' when looking up "
+                               "several articles: those lookups are batched into one request, xml ones are not",
                 "parameters": {
                     "type": "object",
                     "properties": {
                         "id": {
                             "type": "string",
                             "description": "The ID of the article"
+                        },
+                        "output": {
+                            "type": "string",
+                            "description": "'xml' for the raw Atom feed (default) or 'records' for compact parsed records, which are batched with concurrent lookups",
+                            "enum": ["xml", "records"],
+                            "default": "xml"
+                        },
+                        "fields": {
+                            "type": "array",
+                            "items": {"type": "string", "enum": list(FIELDS)},
+                            "description": "Record fields to return (default: id, title, authors, published, categories, summary)"
+                        },
+                        "abstract_chars": {
+                            "type": "integer",
+                            "description": "Truncate abstracts to this many characters (default: 500)"
                         }
                     },
                     "required": ["id"]
@@ -31,11 +105,34 @@ class GetArticle(BaseTool):
             }
         }
 
-    def fn(self, id):
+    def fn(self, id, output="xml", fields=None, abstract_chars=500):
+        logger.debug("Fetching Article '%s' from ArXiv", id)
+        params = {
+            "id_list": id
+        }
+        if output == "xml":
+            response = self.http.get(base_url, params=params)
+            response.raise_for_status()
+            return response.text
+        if self.batch_window is not None:
+            record = self.loader.load(id)
+            return project(record, fields or DEFAULT_FIELDS, abstract_chars) if record else None
+        with self.http.get(base_url, params=params, stream=True) as response:
+            response.raise_for_status()
+            records = parse_feed(response.iter_content(chunk_size=64 * 1024), fields or DEFAULT_FIELDS, abstract_chars)
+        return records[0] if records else None
+
+    async def afn(self, id, output="xml", fields=None, abstract_chars=500):
         logger.debug("Fetching Article '%s' from ArXiv", id)
-        base_url = "http://export.arxiv.org/api/query"
         params = {
             "id_list": id
         }
-        response = requests.get(base_url, params=params)
-        return response.text  
\ No newline at end of file
+        if output == "records" and self.batch_window is not None:
+            record = await self.loader.aload(id)
+            return project(record, fields or DEFAULT_FIELDS, abstract_chars) if record else None
+        response = await self.http.aget(base_url, params=params)
+        response.raise_for_status()
+        if output == "xml":
+            return response.text
+        records = parse_feed(response.content, fields or DEFAULT_FIELDS, abstract_chars)
+        return records[0] if records else None
\ No newline at end of file
@@ -0,0 +1,56 @@
+from..base import BaseTool
+from ..config import FunctionRegistry
+from .atom import DEFAULT_FIELDS, FIELDS, project
+from .get_article import fetch_articles
+from .loader import match_records
+import logging
+
+logger = logging.getLogger(__name__)
+
+@FunctionRegistry.register
+class GetArticles(BaseTool):
+    cache_ttl = 24 * 60 * 60
+    max_batch = 100  # IDs per id_list query
+
+    def __init__(self, name="get_articles"):
+        super().__init__()
+        self.name = name
+
+    @property
+    def definition(self):
+        return {
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "description": "Get several articles from arXiv in one request",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "ids": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "The IDs of the articles"
+                        },
+                        "fields": {
+                            "type": "array",
+                            "items": {"type": "string", "enum": list(FIELDS)},
+                            "description": "Record fields to return (default: id, title, authors, published, categories, summary)"
+                        },
+                        "abstract_chars": {
+                            "type": "integer",
+                            "description": "Truncate abstracts to this many characters (default: 500)"
+                        }
+                    },
+                    "required": ["ids"]
+                }
+            }
+        }
+
+    def fn(self, ids, fields=None, abstract_chars=500):
+        logger.debug("Fetching %d Articles from ArXiv", len(ids))
+        records = []
+        for start in range(0, len(ids), self.max_batch):
+            chunk = ids[start:start + self.max_batch]
+            records.extend(match_records(chunk, fetch_articles(self.http, chunk)))
+        return [project(record, fields or DEFAULT_FIELDS, abstract_chars) if record else None
+                for record in records]
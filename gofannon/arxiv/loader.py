@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+
+from .atom import split_id
+
+logger = logging.getLogger(__name__)
+
+
+def id_key(arxiv_id):
+    """Normalize an ID for matching: ``"1904.11655v2"`` -> ``("1904.11655", "v2")``."""
+    return split_id(arxiv_id.strip())
+
+
+def match_records(ids, records):
+    """Order ``records`` to match ``ids``, with ``None`` for IDs that were not returned.
+
+    An ID without a version matches whichever version arXiv returned.
+    """
+    found = {}
+    for record in records:
+        base, version = id_key(record["id"] + (record.get("version") or ""))
+        found[(base, version)] = record
+        found.setdefault((base, None), record)
+    return [found.get(id_key(arxiv_id)) for arxiv_id in ids]
+
+
+class ArticleLoader:
+    """Coalesces article lookups into batched ``id_list`` queries, DataLoader style.
+
+    The first ID registered while no batch is collecting makes its caller the
+    batch leader. The leader waits ``window`` seconds (less once ``max_batch``
+    IDs are waiting), then fetches every registered ID with ``fetch_many(ids)``,
+    ``max_batch`` per call, on its own thread. Results are fanned back out by ID,
+    with ``None`` for IDs arXiv did not return. Requests for an ID already
+    waiting share its result.
+
+    A batch whose fetch raises an error for which ``splittable(error)`` is true
+    (by default any error) is split in half and each half retried, so a
+    single bad ID fails only its own callers.
+    """
+
+    def __init__(self, fetch_many, window=0.01, max_batch=100, splittable=None):
+        self.fetch_many = fetch_many
+        self.window = window
+        self.max_batch = max_batch
+        self.splittable = splittable or (lambda error: True)
+        self.batches = 0  # Number of fetch_many calls made
+        self._pending = {}  # id key -> (requested id, Future)
+        self._collecting = False
+        self._cond = threading.Condition()
+
+    def _enqueue(self, arxiv_id):
+        """Register ``arxiv_id``; returns its Future and whether the caller leads the batch."""
+        key = id_key(arxiv_id)
+        with self._cond:
+            entry = self._pending.get(key)
+            if entry is None:
+                entry = (arxiv_id.strip(), Future())
+                self._pending[key] = entry
+            leader = not self._collecting
+            self._collecting = True
+            if len(self._pending) >= self.max_batch:
+                self._cond.notify_all()
+            return entry[1], leader
+
+    def _lead(self, wait=True):
+        with self._cond:
+            if wait:
+                self._cond.wait_for(lambda: len(self._pending) >= self.max_batch, timeout=self.window)
+            pending, self._pending = list(self._pending.values()), {}
+            self._collecting = False
+        for start in range(0, len(pending), self.max_batch):
+            self._run_batch(pending[start:start + self.max_batch])
+
+    def _run_batch(self, batch):
+        ids = [requested for requested, _ in batch]
+        with self._cond:
+            self.batches += 1
+        logger.debug("Fetching %d ArXiv articles in one request", len(ids))
+        try:
+            records = self.fetch_many(ids)
+        except Exception as e:
+            if len(batch) == 1 or not self.splittable(e):
+                for _, future in batch:
+                    future.set_exception(e)
+                return
+            logger.debug("Batch of %d ArXiv articles failed (%s); splitting it", len(ids), e)
+            middle = len(batch) // 2
+            self._run_batch(batch[:middle])
+            self._run_batch(batch[middle:])
+            return
+        for (_, future), record in zip(batch, match_records(ids, records)):
+            future.set_result(record)
+
+    def load(self, arxiv_id):
+        future, leader = self._enqueue(arxiv_id)
+        if leader:
+            self._lead()
+        return future.result()
+
+    def load_many(self, ids):
+        enqueued = [self._enqueue(arxiv_id) for arxiv_id in ids]
+        if any(leader for _, leader in enqueued):
+            self._lead(wait=False)
+        return [future.result() for future, _ in enqueued]
+
+    async def aload(self, arxiv_id):
+        return await asyncio.to_thread(self.load, arxiv_id)
@@ -0,0 +1,23 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """Spaces calls at least ``min_interval`` seconds apart across threads."""
+
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self._next_allowed = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_allowed - now
+            self._next_allowed = max(now, self._next_allowed) + self.min_interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+# arXiv asks API clients to wait three seconds between requests
+arxiv_rate_limiter = RateLimiter(3.0)
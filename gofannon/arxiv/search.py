@@ -1,13 +1,21 @@
 
 from..base import BaseTool
-import requests
 from ..config import FunctionRegistry
+from .atom import AtomParser, DEFAULT_FIELDS, FIELDS, parse_feed, project
+from .store import parse_query
+from .rate_limit import arxiv_rate_limiter
+from concurrent.futures import ThreadPoolExecutor
 import logging
 
 logger = logging.getLogger(__name__)
 
+base_url = "http://export.arxiv.org/api/query"
+
 @FunctionRegistry.register
 class Search(BaseTool):
+    cache_ttl = 60 * 60
+    metadata_store = None  # MetadataStore answering covered queries locally and collecting live results
+
     def __init__(self, name="search"):
         super().__init__()
         self.name = name
@@ -65,6 +73,21 @@ class Search(BaseTool):
                         "cat": {
                             "type": "string",
                             "description": "Search in subject category"
+                        },
+                        "output": {
+                            "type": "string",
+                            "description": "'xml' for the raw Atom feed (default) or 'records' for compact parsed records",
+                            "enum": ["xml", "records"],
+                            "default": "xml"
+                        },
+                        "fields": {
+                            "type": "array",
+                            "items": {"type": "string", "enum": list(FIELDS)},
+                            "description": "Record fields to return (default: id, title, authors, published, categories, summary)"
+                        },
+                        "abstract_chars": {
+                            "type": "integer",
+                            "description": "Truncate abstracts to this many characters (default: 500)"
                         }
                     },
                     "required": ["query"]
@@ -77,9 +100,7 @@ class Search(BaseTool):
             return f"{date}0000"
         return date
 
-    def fn(self, query, start=0, max_results=10, submittedDateFrom=None, submittedDateTo=None, ti=None, au=None, abs=None, co=None, jr=None, cat=None):
-        logger.debug("Querying ArXiv for '%s'", query)
-        base_url = "http://export.arxiv.org/api/query"
+    def _build_params(self, query, start=0, max_results=10, submittedDateFrom=None, submittedDateTo=None, ti=None, au=None, abs=None, co=None, jr=None, cat=None):
         params = {
             "search_query": query,
             "start": start,
@@ -111,5 +132,114 @@ class Search(BaseTool):
         if cat:
             params["search_query"] += f" AND cat:{cat}"
 
-        response = requests.get(base_url, params=params)
-        return response.text
\ No newline at end of file
+        return params
+
+    def fn(self, query, start=0, max_results=10, submittedDateFrom=None, submittedDateTo=None, ti=None, au=None, abs=None, co=None, jr=None, cat=None,
+           output="xml", fields=None, abstract_chars=500):
+        logger.debug("Querying ArXiv for '%s'", query)
+        params = self._build_params(query, start, max_results, submittedDateFrom, submittedDateTo, ti, au, abs, co, jr, cat)
+        if output == "xml":
+            response = self.http.get(base_url, params=params)
+            response.raise_for_status()
+            return response.text
+        store = self.metadata_store
+        if store is not None and not (co or jr):
+            local = store.search(query, start, max_results, submittedDateFrom, submittedDateTo, ti, au, abs, cat)
+            if local is not None:
+                logger.debug("Answered '%s' from the local metadata store", query)
+                return [project(record, fields or DEFAULT_FIELDS, abstract_chars) for record in local]
+        # Parse the feed as it streams in rather than buffering the whole document
+        with self.http.get(base_url, params=params, stream=True) as response:
+            response.raise_for_status()
+            if store is None:
+                return parse_feed(response.iter_content(chunk_size=64 * 1024), fields or DEFAULT_FIELDS, abstract_chars)
+            records = parse_feed(response.iter_content(chunk_size=64 * 1024), FIELDS, None)
+        store.add(records)
+        return [project(record, fields or DEFAULT_FIELDS, abstract_chars) for record in records]
+
+    async def afn(self, query, start=0, max_results=10, submittedDateFrom=None, submittedDateTo=None, ti=None, au=None, abs=None, co=None, jr=None, cat=None,
+                  output="xml", fields=None, abstract_chars=500):
+        logger.debug("Querying ArXiv for '%s'", query)
+        params = self._build_params(query, start, max_results, submittedDateFrom, submittedDateTo, ti, au, abs, co, jr, cat)
+        store = self.metadata_store
+        if output == "records" and store is not None and not (co or jr):
+            local = store.search(query, start, max_results, submittedDateFrom, submittedDateTo, ti, au, abs, cat)
+            if local is not None:
+                return [project(record, fields or DEFAULT_FIELDS, abstract_chars) for record in local]
+        response = await self.http.aget(base_url, params=params)
+        response.raise_for_status()
+        if output == "xml":
+            return response.text
+        if store is None:
+            return parse_feed(response.content, fields or DEFAULT_FIELDS, abstract_chars)
+        records = parse_feed(response.content, FIELDS, None)
+        store.add(records)
+        return [project(record, fields or DEFAULT_FIELDS, abstract_chars) for record in records]
+
+    def _fetch_page(self, params, fields, abstract_chars, rate_limiter):
+        rate_limiter.wait()
+        store = self.metadata_store
+        parser = AtomParser(FIELDS, None) if store is not None else AtomParser(fields, abstract_chars)
+        records = []
+        with self.http.get(base_url, params=params, stream=True) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                records.extend(parser.feed(chunk))
+        records.extend(parser.close())
+        if store is not None:
+            store.add(records)
+            records = [project(record, fields, abstract_chars) for record in records]
+        return records, parser.total_results
+
+    def iter_results(self, query, start=0, max_results=None, page_size=100, submittedDateFrom=None, submittedDateTo=None, ti=None, au=None, abs=None, co=None, jr=None, cat=None,
+                     fields=None, abstract_chars=500, prefetch=True, rate_limiter=None):
+        """Yield records for every match, fetching ``page_size`` results per request.
+
+        The next page is requested in the background while the current one is
+        consumed, so at most two pages are held at a time. Requests go through
+        ``rate_limiter`` (the shared three-second arXiv limiter by default).
+        Iteration ends after ``max_results`` records, when the results run out,
+        or as soon as the caller stops iterating. With a ``metadata_store``, every
+        page is stored, and fully harvesting a plain ``cat:<category>`` query
+        marks that category as covered.
+        """
+        rate_limiter = rate_limiter or arxiv_rate_limiter
+        fields = fields or DEFAULT_FIELDS
+
+        def fetch(offset):
+            count = page_size if max_results is None else min(page_size, start + max_results - offset)
+            params = self._build_params(query, offset, count, submittedDateFrom, submittedDateTo, ti, au, abs, co, jr, cat)
+            logger.debug("Fetching ArXiv results %d-%d for '%s'", offset, offset + count, query)
+            return self._fetch_page(params, fields, abstract_chars, rate_limiter)
+
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        try:
+            offset = start
+            pending = executor.submit(fetch, offset) if executor else None
+            while True:
+                records, total = pending.result() if executor else fetch(offset)
+                offset += len(records)
+                limit = start + max_results if max_results is not None else None
+                if total is not None:
+                    limit = total if limit is None else min(limit, total)
+                more = bool(records) and (limit is None or offset < limit)
+                if executor and more:
+                    pending = executor.submit(fetch, offset)
+                yield from records
+                records = None  # let the page go before waiting on the next one
+                if not more:
+                    self._mark_harvested(query, start, max_results, offset, total,
+                                         (submittedDateFrom, submittedDateTo, ti, au, abs, co, jr, cat))
+                    return
+        finally:
+            if executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def _mark_harvested(self, query, start, max_results, fetched, total, filters):
+        terms = parse_query(query)
+        if self.metadata_store is None or start or any(filters) or not terms:
+            return
+        complete = total is not None and fetched >= total and (max_results is None or max_results >= total)
+        if complete and len(terms) == 1 and terms[0][0] == "cat":
+            logger.info("Marking category %s as covered by the local metadata store", terms[0][1])
+            self.metadata_store.mark_covered(terms[0][1])
@@ -0,0 +1,237 @@
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+from .atom import FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Fields searched with FTS5, keyed by their arXiv query prefix
+TEXT_PREFIXES = {"ti": "title", "au": "authors", "abs": "summary", "all": None}
+
+_TERM = re.compile(r'(?:(\w+):)?("[^"]*"|\S+)')
+
+
+def parse_query(query):
+    """Split a simple arXiv ``search_query`` into ``[(prefix, value), ...]``.
+
+    Terms joined by ``AND`` with the ``ti``, ``au``, ``abs``, ``cat`` and
+    ``all`` prefixes (bare terms count as ``all``) are supported. Returns
+    ``None`` for anything else, such as ``OR``, ``ANDNOT``, parentheses or other
+    fields, so the caller can fall back to the live API.
+    """
+    terms = []
+    for match in _TERM.finditer(query or ""):
+        prefix, value = match.group(1), match.group(2)
+        if prefix is None and value == "AND":
+            continue
+        if prefix is None and (value in ("OR", "ANDNOT") or value.startswith("(") or value.endswith(")")):
+            return None
+        prefix = prefix or "all"
+        if prefix not in TEXT_PREFIXES and prefix != "cat":
+            return None
+        terms.append((prefix, value.strip('"')))
+    return terms
+
+
+def _fts_phrase(text):
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _date_bound(date, end=False):
+    """Turn ``YYYYMMDD[HHMM]`` into an ISO prefix comparable with ``published``."""
+    date = date.ljust(12, "9" if end else "0")[:12]
+    iso = f"{date[:4]}-{date[4:6]}-{date[6:8]}T{date[8:10]}:{date[10:12]}"
+    return iso + (":99Z" if end else "")
+
+
+class MetadataStore:
+    """Local SQLite store of arXiv metadata with an FTS5 index over titles, authors and abstracts.
+
+    Records come from live search results (``add``) and from bulk metadata dumps
+    (``import_dump``). A query is answered locally only if every category it
+    filters on, or the whole archive (``"*"``), has been marked as covered within
+    ``max_age`` seconds. Dumps and complete category harvests mark coverage.
+    """
+
+    def __init__(self, path=None, max_age=7 * 24 * 60 * 60):
+        self.path = Path(path) if path else Path.home() / ".llama" / "arxiv" / "metadata.sqlite"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS articles (
+                id TEXT PRIMARY KEY, record TEXT, published TEXT, fetched_at REAL);
+            CREATE INDEX IF NOT EXISTS articles_published ON articles (published);
+            CREATE TABLE IF NOT EXISTS categories (id TEXT, category TEXT, PRIMARY KEY (category, id));
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                id UNINDEXED, title, authors, summary, tokenize='porter unicode61 remove_diacritics 2');
+            CREATE TABLE IF NOT EXISTS coverage (scope TEXT PRIMARY KEY, covered_at REAL);
+        """)
+
+    def add(self, records, fetched_at=None):
+        """Insert or replace full records (as produced with all ``FIELDS``)."""
+        fetched_at = fetched_at or time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for record in records:
+                    self._add(record, fetched_at)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _add(self, record, fetched_at):
+        arxiv_id = record["id"]
+        self._conn.execute("DELETE FROM articles_fts WHERE id = ?", (arxiv_id,))
+        self._conn.execute("DELETE FROM categories WHERE id = ?", (arxiv_id,))
+        self._conn.execute(
+            "INSERT OR REPLACE INTO articles (id, record, published, fetched_at) VALUES (?, ?, ?, ?)",
+            (arxiv_id, json.dumps(record), record.get("published"), fetched_at)
+        )
+        self._conn.execute(
+            "INSERT INTO articles_fts (id, title, authors, summary) VALUES (?, ?, ?, ?)",
+            (arxiv_id, record.get("title") or "", " ".join(record.get("authors") or []), record.get("summary") or "")
+        )
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO categories (id, category) VALUES (?, ?)",
+            [(arxiv_id, category) for category in record.get("categories") or []]
+        )
+
+    def import_dump(self, source, categories=None, batch_size=1000):
+        """Load an arXiv metadata snapshot (JSON lines, one article per line).
+
+        ``source`` is a path or an iterable of lines. With ``categories``, only
+        articles in one of them are kept and those categories are marked as
+        covered; otherwise the whole archive (``"*"``) is. Returns the number of
+        articles stored.
+        """
+        wanted = set(categories) if categories else None
+        lines = open(source, encoding="utf-8") if isinstance(source, (str, Path)) else source
+        count, batch = 0, []
+        try:
+            for line in lines:
+                if not line.strip():
+                    continue
+                record = self._dump_record(json.loads(line))
+                if wanted is not None and not wanted & set(record["categories"]):
+                    continue
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    self.add(batch)
+                    count, batch = count + len(batch), []
+            self.add(batch)
+            count += len(batch)
+        finally:
+            if lines is not source:
+                lines.close()
+        for scope in (sorted(wanted) if wanted else ["*"]):
+            self.mark_covered(scope)
+        logger.info("Imported %d ArXiv articles into %s", count, self.path)
+        return count
+
+    @staticmethod
+    def _dump_record(item):
+        versions = item.get("versions") or []
+
+        def created(version):
+            try:
+                return parsedate_to_datetime(version["created"]).strftime("%Y-%m-%dT%H:%M:%SZ")
+            except (KeyError, TypeError, ValueError):
+                return None
+
+        if item.get("authors_parsed"):
+            authors = [" ".join(part for part in (name[1], name[0]) if part) for name in item["authors_parsed"]]
+        else:
+            authors = [a.strip() for a in re.split(r",| and ", item.get("authors") or "") if a.strip()]
+        categories = (item.get("categories") or "").split()
+        record = {
+            "id": item["id"],
+            "version": versions[-1]["version"] if versions else None,
+            "title": " ".join((item.get("title") or "").split()),
+            "authors": authors,
+            "published": created(versions[0]) if versions else None,
+            "updated": created(versions[-1]) if versions else None,
+            "categories": categories,
+            "primary_category": categories[0] if categories else None,
+            "summary": " ".join((item.get("abstract") or "").split()),
+            "comment": item.get("comments"),
+            "journal_ref": item.get("journal-ref"),
+            "doi": item.get("doi"),
+            "pdf_url": f"http://arxiv.org/pdf/{item['id']}{versions[-1]['version'] if versions else ''}"
+        }
+        return {field: record.get(field) for field in FIELDS}
+
+    def mark_covered(self, scope, covered_at=None):
+        """Record that every article in ``scope`` (a category, or ``"*"``) is in the store."""
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO coverage (scope, covered_at) VALUES (?, ?)",
+                               (scope, covered_at or time.time()))
+
+    def is_covered(self, scopes):
+        cutoff = time.time() - self.max_age
+        with self._lock:
+            fresh = {row[0] for row in self._conn.execute(
+                "SELECT scope FROM coverage WHERE covered_at >= ?", (cutoff,))}
+        return "*" in fresh or (bool(scopes) and set(scopes) <= fresh)
+
+    def search(self, query, start=0, max_results=10, submittedDateFrom=None, submittedDateTo=None,
+               ti=None, au=None, abs=None, cat=None):
+        """Answer a search locally, or return ``None`` when the store cannot answer it."""
+        terms = parse_query(query)
+        if terms is None:
+            return None
+        for prefix, value in (("ti", ti), ("au", au), ("abs", abs), ("cat", cat)):
+            if value:
+                terms.append((prefix, value))
+        categories = [value for prefix, value in terms if prefix == "cat"]
+        if not self.is_covered(categories):
+            return None
+
+        text = []
+        for prefix, value in terms:
+            if prefix == "cat":
+                continue
+            column = TEXT_PREFIXES[prefix]
+            phrases = [_fts_phrase(value)] if " " in value else \
+                [_fts_phrase(word) for word in value.split()]
+            text.extend(f"{column} : {phrase}" if column else phrase for phrase in phrases)
+
+        sql = "SELECT a.record FROM articles a"
+        where, params = [], []
+        if text:
+            sql += " JOIN articles_fts f ON f.id = a.id"
+            where.append("articles_fts MATCH ?")
+            params.append(" AND ".join(text))
+        for category in categories:
+            where.append("a.id IN (SELECT id FROM categories WHERE category = ?)")
+            params.append(category)
+        if submittedDateFrom:
+            where.append("a.published >= ?")
+            params.append(_date_bound(submittedDateFrom))
+        if submittedDateTo:
+            where.append("a.published <= ?")
+            params.append(_date_bound(submittedDateTo, end=True))
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY " + ("bm25(articles_fts), " if text else "") + "a.published DESC LIMIT ? OFFSET ?"
+        params.extend([max_results, start])
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
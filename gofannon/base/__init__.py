@@ -1,11 +1,18 @@
+import asyncio
+import functools
+import hashlib
+import inspect
 import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import Dict, Any, Callable
 import json
 import logging
+import os
 from pathlib import Path
 from ..config import ToolConfig
+from .transport import HttpTransport, get_transport, set_transport
+from .cache import CacheBackend, MemoryCache, SQLiteCache, CACHE_FOREVER, get_result_cache, set_result_cache
 
 from typing import Any, Dict
 
@@ -33,16 +40,26 @@ class ToolResult:
     retryable: bool = False
 
 class WorkflowContext:
-    def __init__(self, firebase_config=None):
+    def __init__(self, firebase_config=None, journal_name=None, compact_every=50):
         self.data = {}
         self.execution_log = []
         self.firebase_config = firebase_config
         self.local_storage = Path.home() / ".llama" / "checkpoints"
         self.local_storage.mkdir(parents=True, exist_ok=True)
 
+        # Journaled checkpoints append per-step deltas instead of rewriting everything
+        self.journal_name = journal_name
+        self.compact_every = compact_every
+        self._journal_seq = None  # None until the journal is started or loaded
+        self._journal_records = 0
+        self._journaled_data = {}
+        self._journaled_log_len = 0
+
     def save_checkpoint(self, name="checkpoint"):
         if self.firebase_config:
             self._save_to_firebase(name)
+        elif self.journal_name:
+            self._append_journal(name)
         else:
             self._save_local(name)
 
@@ -54,6 +71,149 @@ class WorkflowContext:
                 'execution_log': self.execution_log
             }, f)
 
+    @property
+    def journal_path(self) -> Path:
+        return self.local_storage / f"{self.journal_name}.journal.jsonl"
+
+    @property
+    def snapshot_path(self) -> Path:
+        return self.local_storage / f"{self.journal_name}.snapshot.json"
+
+    def _append_journal(self, name):
+        """Append what changed since the previous checkpoint as one journal record.
+
+        A data key counts as changed when it now holds a different object than at
+        the last checkpoint, so values mutated in place must be reassigned.
+        """
+        if self._journal_seq is None:
+            # First checkpoint of a fresh run: discard any previous journal
+            self.snapshot_path.unlink(missing_ok=True)
+            self.journal_path.write_text("")
+            self._journal_seq = 0
+
+        changed = {
+            key: value for key, value in self.data.items()
+            if key not in self._journaled_data or self._journaled_data[key] is not value
+        }
+        removed = [key for key in self._journaled_data if key not in self.data]
+
+        self._journal_seq += 1
+        record = {
+            'seq': self._journal_seq,
+            'checkpoint': name,
+            'data': changed,
+            'removed': removed,
+            'execution_log': self.execution_log[self._journaled_log_len:]
+        }
+        with open(self.journal_path, 'a') as f:
+            f.write(json.dumps(record) + "\n")
+
+        self._journaled_data = dict(self.data)
+        self._journaled_log_len = len(self.execution_log)
+        self._journal_records += 1
+        if self.compact_every and self._journal_records >= self.compact_every:
+            self.compact_journal()
+
+    def compact_journal(self):
+        """Fold the journal into a snapshot of the full context and truncate it."""
+        tmp_path = self.snapshot_path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'seq': self._journal_seq,
+                'data': self.data,
+                'execution_log': self.execution_log
+            }, f)
+        os.replace(tmp_path, self.snapshot_path)
+        # Records up to 'seq' are skipped on load, so a crash before truncation is harmless
+        self.journal_path.write_text("")
+        self._journal_records = 0
+
+    def load_journal(self):
+        """Rebuild ``data`` and ``execution_log`` from the snapshot and journal.
+
+        Later checkpoints append to the same journal. Returns the name of the
+        last checkpoint replayed, or None if nothing was recorded.
+        """
+        data, execution_log, seq, last_checkpoint = {}, [], 0, None
+        if self.snapshot_path.exists():
+            with open(self.snapshot_path) as f:
+                snapshot = json.load(f)
+            data, execution_log, seq = snapshot['data'], snapshot['execution_log'], snapshot['seq']
+            last_checkpoint = "snapshot"
+
+        records = 0
+        if self.journal_path.exists():
+            with open(self.journal_path, 'rb+') as f:
+                valid_end = 0
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn final line from a crash mid-write; drop it so appends stay valid
+                        f.truncate(valid_end)
+                        break
+                    valid_end += len(line)
+                    if not line.endswith(b"\n"):
+                        f.write(b"\n")
+                    if record['seq'] <= seq:
+                        continue
+                    data.update(record['data'])
+                    for key in record['removed']:
+                        data.pop(key, None)
+                    execution_log.extend(record['execution_log'])
+                    seq = record['seq']
+                    last_checkpoint = record['checkpoint']
+                    records += 1
+
+        self.data = data
+        self.execution_log = execution_log
+        self._journal_seq = seq
+        self._journal_records = records
+        self._journaled_data = dict(data)
+        self._journaled_log_len = len(execution_log)
+        return last_checkpoint
+
+    def load_checkpoint(self, name=None):
+        """Replace ``data`` and ``execution_log`` with a saved checkpoint.
+
+        Journaled contexts replay their own journal. Local and Firebase
+        checkpoints from every workflow share one store, so for those ``name``
+        is required; the newest checkpoint may belong to a different run.
+        Returns the name of the loaded checkpoint, or None if there is nothing
+        to load.
+        """
+        if self.journal_name and not self.firebase_config:
+            return self.load_journal()
+        if name is None:
+            raise ValueError(
+                "Loading a local or Firebase checkpoint needs its name; "
+                "use a journaled context to resume a run without one."
+            )
+        if self.firebase_config:
+            return self._load_from_firebase(name)
+        return self._load_local(name)
+
+    def _load_local(self, name):
+        path = self.local_storage / f"{name}.json"
+        if not path.exists():
+            return None
+        with open(path) as f:
+            checkpoint = json.load(f)
+        self.data = checkpoint.get('data', {})
+        self.execution_log = checkpoint.get('execution_log', [])
+        return path.stem
+
+    def _load_from_firebase(self, name):
+        from firebase_admin import firestore
+        db = firestore.client()
+        doc = db.collection('checkpoints').document(name).get()
+        if not doc.exists:
+            return None
+        checkpoint = doc.to_dict()
+        self.data = checkpoint.get('data', {})
+        self.execution_log = checkpoint.get('execution_log', [])
+        return doc.id
+
     def _save_to_firebase(self, name):
         from firebase_admin import firestore
         db = firestore.client()
@@ -74,12 +234,82 @@ class WorkflowContext:
         self.execution_log.append(entry)
 
 class BaseTool(ABC):
+    transport = None  # HttpTransport override; falls back to get_transport()
+    cache_ttl = None  # Seconds to cache fn results, CACHE_FOREVER, or None to never cache
+    result_cache = None  # CacheBackend override; falls back to get_result_cache()
+
     def __init__(self, **kwargs):
         self.logger = logging.getLogger(f"{self.__class__.__module__}.{self.__class__.__name__}")
         self._load_config()
         self._configure(**kwargs)
+        self._wrap_with_cache()
         self.logger.debug("Initialized %s tool", self.__class__.__name__)
 
+    def _wrap_with_cache(self):
+        """Route fn and afn through the result cache; the TTL is checked per call."""
+        uncached_fn = self.fn
+        signature = inspect.signature(uncached_fn)
+
+        @functools.wraps(uncached_fn)
+        def cached_fn(*args, **kwargs):
+            cache, key = self._cache_lookup_key(signature, args, kwargs)
+            if cache is None:
+                return uncached_fn(*args, **kwargs)
+            hit, value = cache.lookup(key)
+            if hit:
+                return value
+            result = uncached_fn(*args, **kwargs)
+            cache.store(key, result, self.cache_ttl)
+            return result
+
+        self.fn = cached_fn
+
+        # The default afn delegates to fn, which is already cached
+        if type(self).afn is BaseTool.afn:
+            return
+        uncached_afn = self.afn
+
+        @functools.wraps(uncached_afn)
+        async def cached_afn(*args, **kwargs):
+            cache, key = self._cache_lookup_key(signature, args, kwargs)
+            if cache is None:
+                return await uncached_afn(*args, **kwargs)
+            hit, value = cache.lookup(key)
+            if hit:
+                return value
+            result = await uncached_afn(*args, **kwargs)
+            cache.store(key, result, self.cache_ttl)
+            return result
+
+        self.afn = cached_afn
+
+    def _cache_lookup_key(self, signature, args, kwargs):
+        """Return ``(cache, key)``, or ``(None, None)`` when this call should not be cached."""
+        if self.cache_ttl is None:
+            return None, None
+        cache = self.result_cache if self.result_cache is not None else get_result_cache()
+        if cache is None:
+            return None, None
+        try:
+            bound = signature.bind(*args, **kwargs)
+        except TypeError:
+            return None, None
+        bound.apply_defaults()
+        arguments = json.dumps(bound.arguments, sort_keys=True, default=str)
+        key = f"{self.__class__.__name__}:{getattr(self, 'name', '')}:{arguments}"
+        api_key = getattr(self, 'api_key', None)
+        if api_key:
+            # Keep results fetched with different credentials apart
+            key += ":" + hashlib.sha256(api_key.encode()).hexdigest()[:16]
+        extra = self.cache_key_extra()
+        if extra is not None:
+            key += ":" + json.dumps(extra, sort_keys=True, default=str)
+        return cache, key
+
+    def cache_key_extra(self):
+        """Instance configuration that changes fn's result, kept apart in the result cache."""
+        return None
+
     def _configure(self, **kwargs):
         """Set instance-specific configurations"""
         for key, value in kwargs.items():
@@ -96,6 +326,11 @@ class BaseTool(ABC):
     def definition(self):
         pass
 
+    @property
+    def http(self) -> HttpTransport:
+        """Transport for network calls: the tool's own, or the shared default."""
+        return self.transport if self.transport is not None else get_transport()
+
     @property
     def output_schema(self):
         return self.definition.get('function', {}).get('parameters', {})
@@ -104,6 +339,16 @@ class BaseTool(ABC):
     def fn(self, *args, **kwargs):
         pass
 
+    async def afn(self, *args, **kwargs):
+        """Async counterpart of ``fn``.
+
+        Tools with non-blocking implementations override this. The default runs
+        the synchronous ``fn`` in the event loop's default executor so every tool
+        can be awaited.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.fn, *args, **kwargs))
+
     def execute(self, context: WorkflowContext, **kwargs) -> ToolResult:
         try:
             start_time = time.time()
@@ -126,6 +371,28 @@ class BaseTool(ABC):
                 retryable=True
             )
 
+    async def aexecute(self, context: WorkflowContext, **kwargs) -> ToolResult:
+        try:
+            start_time = time.time()
+            result = await self.afn(**kwargs)
+            duration = time.time() - start_time
+
+            context.log_execution(
+                tool_name=self.__class__.__name__,
+                duration=duration,
+                input_data=kwargs,
+                output_data=result
+            )
+
+            return ToolResult(success=True, output=result)
+        except Exception as e:
+            return ToolResult(
+                success=False,
+                output=None,
+                error=str(e),
+                retryable=True
+            )
+
     def import_from_smolagents(self, smol_tool: "SmolTool"):
         """
         Takes a smolagents Tool instance and adapts it into this Tool.
@@ -0,0 +1,181 @@
+import copy
+import pickle
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+
+CACHE_FOREVER = float("inf")
+
+
+class CacheBackend(ABC):
+    """Key/value store with per-entry TTL and hit, miss and eviction counters.
+
+    ``lookup`` returns a ``(hit, value)`` pair so that ``None`` results can be
+    cached too. A ``ttl`` of ``CACHE_FOREVER`` never expires.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.RLock()
+
+    @abstractmethod
+    def _get(self, key, now):
+        """Return ``(hit, value)``; expired entries are removed and reported as misses."""
+
+    @abstractmethod
+    def _set(self, key, value, expires_at):
+        """Store ``value``, returning the number of entries evicted to make room."""
+
+    @abstractmethod
+    def _clear(self):
+        pass
+
+    @abstractmethod
+    def __len__(self):
+        pass
+
+    def lookup(self, key):
+        with self._lock:
+            hit, value = self._get(key, time.time())
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return hit, value
+
+    def store(self, key, value, ttl=CACHE_FOREVER):
+        expires_at = None if ttl == CACHE_FOREVER else time.time() + ttl
+        with self._lock:
+            self.evictions += self._set(key, value, expires_at)
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "size": len(self)
+            }
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU cache holding at most ``maxsize`` entries.
+
+    Values are copied on the way in and out, so callers mutating a result
+    never change what later hits return.
+    """
+
+    def __init__(self, maxsize=1024):
+        super().__init__()
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def _get(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= now:
+            del self._entries[key]
+            self.expirations += 1
+            return False, None
+        self._entries.move_to_end(key)
+        return True, copy.deepcopy(value)
+
+    def _set(self, key, value, expires_at):
+        self._entries[key] = (copy.deepcopy(value), expires_at)
+        self._entries.move_to_end(key)
+        evicted = 0
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            evicted += 1
+        return evicted
+
+    def _clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCache(CacheBackend):
+    """On-disk LRU cache that survives restarts. Values are pickled."""
+
+    def __init__(self, path=None, maxsize=10000):
+        super().__init__()
+        self.path = Path(path) if path else Path.home() / ".llama" / "cache" / "results.sqlite"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.maxsize = maxsize
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value BLOB, expires_at REAL, accessed_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+        self._size = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def _get(self, key, now):
+        row = self._conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return False, None
+        value, expires_at = row
+        if expires_at is not None and expires_at <= now:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._size -= 1
+            self.expirations += 1
+            return False, None
+        self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return True, pickle.loads(value)
+
+    def _set(self, key, value, expires_at):
+        exists = self._conn.execute("SELECT 1 FROM cache WHERE key = ?", (key,)).fetchone()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, pickle.dumps(value), expires_at, time.time())
+        )
+        if not exists:
+            self._size += 1
+        evicted = max(self._size - self.maxsize, 0)
+        if evicted:
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at LIMIT ?)",
+                (evicted,)
+            )
+            self._size -= evicted
+        return evicted
+
+    def _clear(self):
+        self._conn.execute("DELETE FROM cache")
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def close(self):
+        self._conn.close()
+
+
+_default_result_cache = MemoryCache()
+
+
+def get_result_cache():
+    """Return the process-wide tool result cache (``None`` when disabled)."""
+    return _default_result_cache
+
+
+def set_result_cache(cache):
+    """Replace the process-wide tool result cache; pass ``None`` to disable caching."""
+    global _default_result_cache
+    _default_result_cache = cache
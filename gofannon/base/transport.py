@@ -0,0 +1,158 @@
+import asyncio
+import threading
+import weakref
+from urllib.parse import urlsplit, urlunsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+class HttpTransport:
+    """Pooled HTTP transport shared by the network-backed tools.
+
+    Sync calls go through one ``requests.Session`` whose adapters keep a
+    keep-alive connection pool per host; async calls go through one
+    ``httpx.AsyncClient`` per event loop, closed when that loop shuts down its
+    async generators (as ``asyncio.run`` does) or on ``aclose``. Both apply
+    default connect/read timeouts and ask for gzip-compressed responses.
+
+    ``host_overrides`` maps a hostname to a replacement base URL, e.g.
+    ``{"export.arxiv.org": "http://127.0.0.1:8080"}``, so tests and benchmarks
+    can point every tool at a local stand-in server.
+
+    The sync methods take ``requests`` keyword arguments and the async methods
+    take ``httpx`` keyword arguments.
+    """
+
+    def __init__(self,
+                 pool_connections=10,
+                 pool_maxsize=10,
+                 connect_timeout=5.0,
+                 read_timeout=30.0,
+                 host_overrides=None,
+                 headers=None):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.timeout = (connect_timeout, read_timeout)
+        self.host_overrides = host_overrides or {}
+        self.headers = {'Accept-Encoding': 'gzip, deflate', **(headers or {})}
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._async_clients = weakref.WeakKeyDictionary()  # loop -> (client, closer)
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=self.pool_connections,
+                                          pool_maxsize=self.pool_maxsize)
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    session.headers.update(self.headers)
+                    self._session = session
+        return self._session
+
+    async def _async_client(self) -> httpx.AsyncClient:
+        # httpx connection pools are bound to the loop that created them
+        loop = asyncio.get_running_loop()
+        entry = self._async_clients.get(loop)
+        if entry is None:
+            connect_timeout, read_timeout = self.timeout
+            client = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=self.pool_connections * self.pool_maxsize,
+                    max_keepalive_connections=self.pool_connections * self.pool_maxsize
+                )
+            )
+            # The loop finalizes started async generators in shutdown_asyncgens,
+            # while it can still run the client's aclose
+            closer = self._close_at_shutdown(loop, client)
+            await closer.__anext__()
+            entry = self._async_clients[loop] = (client, closer)
+        return entry[0]
+
+    def _rewrite(self, url):
+        parts = urlsplit(url)
+        override = self.host_overrides.get(parts.hostname)
+        if override is None:
+            return url
+        target = urlsplit(override)
+        path = target.path.rstrip('/') + parts.path
+        return urlunsplit((target.scheme, target.netloc, path, parts.query, parts.fragment))
+
+    def request(self, method, url, **kwargs) -> requests.Response:
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.request(method, self._rewrite(url), **kwargs)
+
+    def get(self, url, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs) -> requests.Response:
+        return self.request('PUT', url, **kwargs)
+
+    async def arequest(self, method, url, **kwargs) -> httpx.Response:
+        client = await self._async_client()
+        return await client.request(method, self._rewrite(url), **kwargs)
+
+    async def aget(self, url, **kwargs) -> httpx.Response:
+        return await self.arequest('GET', url, **kwargs)
+
+    async def apost(self, url, **kwargs) -> httpx.Response:
+        return await self.arequest('POST', url, **kwargs)
+
+    async def aput(self, url, **kwargs) -> httpx.Response:
+        return await self.arequest('PUT', url, **kwargs)
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    async def aclose(self):
+        """Close the running loop's async client; the next async call opens a new one."""
+        entry = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if entry is not None:
+            await entry[1].aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def _close_at_shutdown(self, loop, client):
+        try:
+            yield
+        finally:
+            entry = self._async_clients.get(loop)
+            if entry is not None and entry[0] is client:
+                del self._async_clients[loop]
+            await client.aclose()
+
+
+_default_transport = None
+_default_transport_lock = threading.Lock()
+
+
+def get_transport() -> HttpTransport:
+    """Return the process-wide transport, creating it on first use."""
+    global _default_transport
+    if _default_transport is None:
+        with _default_transport_lock:
+            if _default_transport is None:
+                _default_transport = HttpTransport()
+    return _default_transport
+
+
+def set_transport(transport: HttpTransport):
+    """Replace the process-wide transport used by tools without their own."""
+    global _default_transport
+    with _default_transport_lock:
+        _default_transport = transport
@@ -1,4 +1,4 @@
-from..base import BaseTool
+from..base import BaseTool, CACHE_FOREVER
 from ..config import FunctionRegistry
 import logging
 
@@ -6,6 +6,8 @@ logger = logging.getLogger(__name__)
 
 @FunctionRegistry.register
 class Division(BaseTool):
+    cache_ttl = CACHE_FOREVER
+
     def __init__(self, name="division"):
         super().__init__()
         self.name = name
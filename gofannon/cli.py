@@ -10,15 +10,20 @@ def main():
     parser.add_argument('--firebase', help='Firebase config path')
     parser.add_argument('--workflow', required=True, help='Workflow config JSON')
     parser.add_argument('--output', help='Output file path')
+    parser.add_argument('--resume', action='store_true', help='Resume the run in --journal or --checkpoint, skipping completed steps')
+    parser.add_argument('--journal', help='Journal name for append-only local checkpoints')
+    parser.add_argument('--checkpoint', help='Checkpoint name to resume from when not using --journal')
 
     args = parser.parse_args()
+    if args.resume and not (args.journal or args.checkpoint):
+        parser.error('--resume needs --journal or --checkpoint to identify the run')
 
     # Initialize context
     if args.firebase:
         FirebaseWrapper.initialize(args.firebase)
         context = FirebaseWrapper.get_context('current_workflow')
     else:
-        context = WorkflowContext()
+        context = WorkflowContext(journal_name=args.journal)
 
         # Load workflow config
     with open(args.workflow) as f:
@@ -26,15 +31,23 @@ def main():
 
         # Import and instantiate tools
     tools = []
+    depends_on = {}
     for tool_config in workflow_config['tools']:
         module = __import__(f".{tool_config['module']}", fromlist=[tool_config['class']])
         tool_class = getattr(module, tool_config['class'])
         tool = tool_class(**tool_config.get('params', {}))
         tools.append(tool)
+        if 'depends_on' in tool_config:
+            depends_on[tool_config['class']] = tool_config['depends_on']
 
         # Execute workflow
-    chain = ToolChain(tools, context)
-    result = chain.execute(workflow_config.get('initial_input', {}))
+    chain = ToolChain(tools, context,
+                      depends_on=depends_on,
+                      max_workers=workflow_config.get('max_workers', 4))
+    result = chain.execute(workflow_config.get('initial_input', {}),
+                           resume=args.resume,
+                           checkpoint=args.checkpoint,
+                           mode=workflow_config.get('mode', 'sequential'))
 
     # Handle output
     if args.output:
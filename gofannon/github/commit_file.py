@@ -1,5 +1,4 @@
 
-import requests
 import json
 
 from..base import BaseTool
@@ -10,6 +9,8 @@ logger = logging.getLogger(__name__)
 
 @FunctionRegistry.register
 class CommitFile(BaseTool):
+    cache_ttl = None  # Writes to GitHub; never cached
+
     def __init__(self,
                  api_key=None,
                  name="commit_file",):
@@ -50,11 +51,7 @@ class CommitFile(BaseTool):
             }
         }
 
-    def fn(self, repo_url,
-           file_path,
-           file_contents,
-           commit_message)-> str:
-        logger.debug(f"Committing file {file_path} to {repo_url}")
+    def _build_request(self, repo_url, file_path, file_contents, commit_message):
         # Extracting the owner and repo name from the URL
         repo_parts = repo_url.rstrip('/').split('/')
         owner = repo_parts[-2]
@@ -70,8 +67,28 @@ class CommitFile(BaseTool):
             "message": commit_message,
             "content": file_contents
         }
+        return api_url, headers, data
+
+    def fn(self, repo_url,
+           file_path,
+           file_contents,
+           commit_message)-> str:
+        logger.debug(f"Committing file {file_path} to {repo_url}")
+        api_url, headers, data = self._build_request(repo_url, file_path, file_contents, commit_message)
+
+        response = self.http.put(api_url, headers=headers, data=json.dumps(data))
+        response.raise_for_status()
+
+        return response.json()
+
+    async def afn(self, repo_url,
+                  file_path,
+                  file_contents,
+                  commit_message)-> str:
+        logger.debug(f"Committing file {file_path} to {repo_url}")
+        api_url, headers, data = self._build_request(repo_url, file_path, file_contents, commit_message)
 
-        response = requests.put(api_url, headers=headers, data=json.dumps(data))
+        response = await self.http.aput(api_url, headers=headers, content=json.dumps(data))
         response.raise_for_status()
 
         return response.json()
\ No newline at end of file
@@ -13,6 +13,8 @@ logger = logging.getLogger(__name__)
 
 @FunctionRegistry.register
 class CommitFiles(BaseTool):
+    cache_ttl = None  # Writes to GitHub; never cached
+
     def __init__(self,
                  api_key=None,
                  name="commit_files",
@@ -1,4 +1,3 @@
-from requests import post
 from json import dumps
 from..base import BaseTool
 from ..config import FunctionRegistry
@@ -8,6 +7,8 @@ logger = logging.getLogger(__name__)
 
 @FunctionRegistry.register
 class CreateIssue(BaseTool):
+    cache_ttl = None  # Writes to GitHub; never cached
+
     def __init__(self,
                  api_key=None,
                  name="create_issue"):
@@ -51,8 +52,7 @@ class CreateIssue(BaseTool):
             }
         }
 
-    def fn(self, repo_url, title, body, labels=None):
-        logger.debug(f"Crating issue'{title}' in repo {repo_url}")
+    def _build_request(self, repo_url, title, body, labels=None):
         # Extracting the owner and repo name from the URL
         repo_parts = repo_url.rstrip('/').split('/')
         owner = repo_parts[-2]
@@ -72,7 +72,22 @@ class CreateIssue(BaseTool):
         if labels:
             payload["labels"] = labels
 
-        response = post(api_url, headers=headers, json=payload)
+        return api_url, headers, payload
+
+    def fn(self, repo_url, title, body, labels=None):
+        logger.debug(f"Crating issue'{title}' in repo {repo_url}")
+        api_url, headers, payload = self._build_request(repo_url, title, body, labels)
+
+        response = self.http.post(api_url, headers=headers, json=payload)
+        response.raise_for_status()
+
+        return dumps(response.json())
+
+    async def afn(self, repo_url, title, body, labels=None):
+        logger.debug(f"Crating issue'{title}' in repo {repo_url}")
+        api_url, headers, payload = self._build_request(repo_url, title, body, labels)
+
+        response = await self.http.apost(api_url, headers=headers, json=payload)
         response.raise_for_status()
 
         return dumps(response.json())
\ No newline at end of file
@@ -1,4 +1,4 @@
-import requests
+import asyncio
 from ..base import BaseTool
 from ..config import FunctionRegistry
 import logging
@@ -7,6 +7,7 @@ logger = logging.getLogger(__name__)
 
 @FunctionRegistry.register
 class GetRepoContents(BaseTool):
+    cache_ttl = 5 * 60
 
     def __init__(self,
                  api_key=None,
@@ -56,12 +57,11 @@ class GetRepoContents(BaseTool):
             }
         }
 
-    def fn(self, repo_url,
-           directory_path = "/",
-           eoi = None)-> str:
-        logger.debug(f"Getting contents of repo {repo_url}")
-        if eoi is None:
-            eoi = self.eoi
+    def cache_key_extra(self):
+        # fn falls back to self.eoi when no eoi is passed
+        return self.eoi
+
+    def _build_request(self, repo_url, directory_path):
         # Extracting the owner and repo name from the URL
         repo_parts = repo_url.rstrip('/').split('/')
         owner = repo_parts[-2]
@@ -71,8 +71,17 @@ class GetRepoContents(BaseTool):
         headers = {
             'Authorization': f'token {self.api_key}'
         }
+        return api_url, headers
+
+    def fn(self, repo_url,
+           directory_path = "/",
+           eoi = None)-> str:
+        logger.debug(f"Getting contents of repo {repo_url}")
+        if eoi is None:
+            eoi = self.eoi
+        api_url, headers = self._build_request(repo_url, directory_path)
 
-        response = requests.get(api_url, headers=headers)
+        response = self.http.get(api_url, headers=headers)
         response.raise_for_status()
 
         contents = response.json()
@@ -81,7 +90,7 @@ class GetRepoContents(BaseTool):
 
         for item in contents:
             if item['type'] == 'file':
-                file_response = requests.get(item['download_url'], headers=headers)
+                file_response = self.http.get(item['download_url'], headers=headers)
                 extension = item['name'].split('.')[-1]
                 if extension in eoi:
                     language = eoi[extension]
@@ -95,4 +104,33 @@ class GetRepoContents(BaseTool):
                 subdirectory_contents = self.fn(repo_url, item['path'], eoi)
                 result.append(subdirectory_contents)
 
+        return "\n\n".join(result)
+
+    async def afn(self, repo_url,
+                  directory_path = "/",
+                  eoi = None)-> str:
+        logger.debug(f"Getting contents of repo {repo_url}")
+        if eoi is None:
+            eoi = self.eoi
+        api_url, headers = self._build_request(repo_url, directory_path)
+
+        response = await self.http.aget(api_url, headers=headers)
+        response.raise_for_status()
+
+        async def fetch_file(item, language):
+            file_response = await self.http.aget(item['download_url'], headers=headers)
+            file_response.raise_for_status()
+            return f"{item['path']}\n```{language}\n{file_response.text}\n```"
+
+        # Files and subdirectories are fetched concurrently; gather keeps listing order
+        pending = []
+        for item in response.json():
+            if item['type'] == 'file':
+                extension = item['name'].split('.')[-1]
+                if extension in eoi:
+                    pending.append(fetch_file(item, eoi[extension]))
+            elif item['type'] == 'dir':
+                pending.append(self.afn(repo_url, item['path'], eoi))
+
+        result = await asyncio.gather(*pending)
         return "\n\n".join(result)
\ No newline at end of file
@@ -1,6 +1,6 @@
 
 from..base import BaseTool
-import requests
+import asyncio
 import json
 from ..config import FunctionRegistry
 import logging
@@ -9,6 +9,8 @@ logger = logging.getLogger(__name__)
 
 @FunctionRegistry.register
 class ReadIssue(BaseTool):
+    cache_ttl = 60
+
     def __init__(self, api_key=None, name="read_issue"):
         super().__init__()
         self.api_key = api_key
@@ -39,8 +41,7 @@ class ReadIssue(BaseTool):
             }
         }
 
-    def fn(self, repo_url, issue_number):
-        logger.debug(f"Reading issue number {issue_number} from repo {repo_url}")
+    def _build_request(self, repo_url, issue_number):
         # Extracting the owner and repo name from the URL
         repo_parts = repo_url.rstrip('/').split('/')
         owner = repo_parts[-2]
@@ -52,11 +53,16 @@ class ReadIssue(BaseTool):
         headers = {
             'Authorization': f'token {self.api_key}'
         }
+        return issue_url, comment_url, headers
+
+    def fn(self, repo_url, issue_number):
+        logger.debug(f"Reading issue number {issue_number} from repo {repo_url}")
+        issue_url, comment_url, headers = self._build_request(repo_url, issue_number)
 
-        issue_response = requests.get(issue_url, headers=headers)
+        issue_response = self.http.get(issue_url, headers=headers)
         issue_response.raise_for_status()
 
-        comment_response = requests.get(comment_url, headers=headers)
+        comment_response = self.http.get(comment_url, headers=headers)
         comment_response.raise_for_status()
 
         issue_data = issue_response.json()
@@ -67,4 +73,22 @@ class ReadIssue(BaseTool):
             "comments": comment_data
         }
 
-        return json.dumps(result, indent=4)  
\ No newline at end of file
+        return json.dumps(result, indent=4)
+
+    async def afn(self, repo_url, issue_number):
+        logger.debug(f"Reading issue number {issue_number} from repo {repo_url}")
+        issue_url, comment_url, headers = self._build_request(repo_url, issue_number)
+
+        issue_response, comment_response = await asyncio.gather(
+            self.http.aget(issue_url, headers=headers),
+            self.http.aget(comment_url, headers=headers)
+        )
+        issue_response.raise_for_status()
+        comment_response.raise_for_status()
+
+        result = {
+            "issue": issue_response.json(),
+            "comments": comment_response.json()
+        }
+
+        return json.dumps(result, indent=4)
\ No newline at end of file
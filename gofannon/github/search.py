@@ -1,5 +1,4 @@
 from..base import BaseTool
-import requests
 from ..config import FunctionRegistry
 import logging
 
@@ -7,6 +6,8 @@ logger = logging.getLogger(__name__)
 
 @FunctionRegistry.register
 class SearchRepos(BaseTool):
+    cache_ttl = 5 * 60
+
     def __init__(self,
                  api_key=None,
                  name="search_repos",):
@@ -43,8 +44,7 @@ class SearchRepos(BaseTool):
             }
         }
 
-    def fn(self, query, page=1, per_page=10) -> str:
-        logger.debug(f"Searching github.com for '{query}'")
+    def _build_request(self, query, page=1, per_page=10):
         api_url = f"https://api.github.com/search/repositories"
         headers = {
             'Authorization': f'token {self.api_key}'
@@ -54,14 +54,29 @@ class SearchRepos(BaseTool):
             "page": page,
             "per_page": per_page
         }
+        return api_url, headers, params
 
-        response = requests.get(api_url, headers=headers, params=params)
-        response.raise_for_status()
-
-        results = response.json()
-
+    def _format_results(self, results):
         formatted_results = []
         for result in results['items']:
             formatted_results.append(f"**{result['name']}** by **{result['owner']['login']}** - {result['description']}")
 
-        return "\n\n".join(formatted_results)  
\ No newline at end of file
+        return "\n\n".join(formatted_results)
+
+    def fn(self, query, page=1, per_page=10) -> str:
+        logger.debug(f"Searching github.com for '{query}'")
+        api_url, headers, params = self._build_request(query, page, per_page)
+
+        response = self.http.get(api_url, headers=headers, params=params)
+        response.raise_for_status()
+
+        return self._format_results(response.json())
+
+    async def afn(self, query, page=1, per_page=10) -> str:
+        logger.debug(f"Searching github.com for '{query}'")
+        api_url, headers, params = self._build_request(query, page, per_page)
+
+        response = await self.http.aget(api_url, headers=headers, params=params)
+        response.raise_for_status()
+
+        return self._format_results(response.json())
\ No newline at end of file
@@ -1,4 +1,3 @@
-from requests import get
 from json import dumps
 
 from ..base import BaseTool
@@ -7,8 +6,12 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+base_url = "https://api.nhtsa.gov/complaints/complaintsByVehicle"
+
 @FunctionRegistry.register
 class ComplaintsByVehicle(BaseTool):
+    cache_ttl = 24 * 60 * 60
+
     def __init__(self,
                  api_key=None,
                  name="complaints_by_vehicle",):
@@ -49,11 +52,24 @@ class ComplaintsByVehicle(BaseTool):
                  model,
                  modelYear)-> str:
         logger.debug(f"Searching for complaints related to {modelYear} {make} {model}")
-        base_url = "https://api.nhtsa.gov/complaints/complaintsByVehicle"
         payload = {
             "make": make,
             "model": model,
             "modelYear": modelYear
         }
-        r = get(base_url, params=payload)
+        r = self.http.get(base_url, params=payload)
+        r.raise_for_status()
+        return dumps(r.json())
+
+    async def afn(self, make,
+                  model,
+                  modelYear)-> str:
+        logger.debug(f"Searching for complaints related to {modelYear} {make} {model}")
+        payload = {
+            "make": make,
+            "model": model,
+            "modelYear": modelYear
+        }
+        r = await self.http.aget(base_url, params=payload)
+        r.raise_for_status()
         return dumps(r.json())
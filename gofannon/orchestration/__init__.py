@@ -1,5 +1,6 @@
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from typing import List, Dict, Any
 from ..base import WorkflowContext, ToolResult
 from ..config import FunctionRegistry
@@ -8,11 +9,12 @@ import logging
 logger = logging.getLogger(__name__)
 
 class FunctionOrchestrator:
-    def __init__(self, llm_client, tool_configs=None):
+    def __init__(self, llm_client, tool_configs=None, max_concurrency=1):
         self.logger = logging.getLogger(f"{__name__}.FunctionOrchestrator")
         self.llm = llm_client
         self.available_functions = FunctionRegistry.get_tools()
         self.tool_configs = tool_configs or {}
+        self.max_concurrency = max_concurrency
         self.function_map = self.function_map = self._build_function_map()
         self.logger.debug("Available functions in orchestrator: " + ', '.join(
             [f['function']['name'] for f in self.available_functions]))
@@ -29,10 +31,42 @@ class FunctionOrchestrator:
         tool_class, config = self.function_map[function_name]
         return tool_class(**config)
 
-    def execute_workflow(self, user_query: str, model_name: str, max_steps=5):
+    def _run_tool_call(self, tool_call):
+        function_name = tool_call.function.name
+        function_args = json.loads(tool_call.function.arguments)
+
+        # Instantiate tool with configuration and execute function
+        tool = self._instantiate_tool(function_name)
+        result = tool.fn(**function_args)
+
+        return {
+            "role": "tool",
+            "tool_call_id": tool_call.id,
+            "content": str(result),#.output,
+            # "name": function_name
+        }
+
+    def _run_tool_calls(self, tool_calls, max_concurrency):
+        """Run the tool calls of one LLM turn, returning tool messages in call order.
+
+        With ``max_concurrency`` > 1 the calls are dispatched on a thread pool so
+        network-bound tools overlap; results are still returned in the order the
+        model issued them, keeping the conversation deterministic.
+        """
+        if max_concurrency <= 1 or len(tool_calls) <= 1:
+            return [self._run_tool_call(tool_call) for tool_call in tool_calls]
+
+        workers = min(max_concurrency, len(tool_calls))
+        self.logger.debug("Dispatching %d tool calls with %d workers", len(tool_calls), workers)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self._run_tool_call, tool_calls))
+
+    def execute_workflow(self, user_query: str, model_name: str, max_steps=5, max_concurrency=None):
         self.logger.debug("Starting workflow execution with query: %s", user_query)
         messages = [{"role": "user", "content": user_query}]
         final_answer = None
+        if max_concurrency is None:
+            max_concurrency = self.max_concurrency
 
         for _ in range(max_steps):
             # Get LLM response
@@ -51,28 +85,7 @@ class FunctionOrchestrator:
 
                 # Process tool calls if any
             if msg.tool_calls:
-                for tool_call in msg.tool_calls:
-                    function_name = tool_call.function.name
-
-                    function_args = json.loads(tool_call.function.arguments)
-
-                    # Execute function
-                    # Get tool class and configuration
-                    tool_class, config = self.function_map[function_name]
-
-                    # Instantiate tool with configuration
-                    tool = tool_class(**config)
-
-                    # Execute function
-                    result = tool.fn(**function_args)
-
-                    # Store result in context
-                    messages.append({
-                        "role": "tool",
-                        "tool_call_id": tool_call.id,
-                        "content": str(result),#.output,
-                        # "name": function_name
-                    })
+                messages.extend(self._run_tool_calls(msg.tool_calls, max_concurrency))
             else:
                 break  # Exit if no tools called and no content
 
@@ -100,9 +113,11 @@ class FunctionOrchestrator:
         }
 
 class ToolChain:
-    def __init__(self, tools: List[Any], context: WorkflowContext):
+    def __init__(self, tools: List[Any], context: WorkflowContext, depends_on: Dict[str, List[str]] = None, max_workers: int = 4):
         self.tools = tools
         self.context = context
+        self.depends_on = depends_on or {}
+        self.max_workers = max_workers
 
     def _resolve_input(self, input_template: str) -> Any:
         if not input_template:
@@ -113,17 +128,154 @@ class ToolChain:
             return self.context.data.get(key)
         return input_template
 
-    def execute(self, initial_input: Dict[str, Any] = None) -> ToolResult:
+    def _step_inputs(self, tool) -> Dict[str, Any]:
+        return tool.definition.get('function', {}).get('parameters', {})
+
+    def _resolve_inputs(self, tool) -> Dict[str, Any]:
+        return {k: self._resolve_input(v) for k, v in self._step_inputs(tool).items()}
+
+    def _finished_steps(self) -> set:
+        """Indices of steps whose output and execution log entry are in the context."""
+        logged = {}
+        for entry in self.context.execution_log:
+            logged[entry.get('tool')] = logged.get(entry.get('tool'), 0) + 1
+
+        finished = set()
+        seen = {}
+        for index, tool in enumerate(self.tools):
+            tool_name = tool.__class__.__name__
+            seen[tool_name] = seen.get(tool_name, 0) + 1
+            if f"{tool_name}_output" in self.context.data and logged.get(tool_name, 0) >= seen[tool_name]:
+                finished.add(index)
+        return finished
+
+    def _dependency_graph(self) -> Dict[int, set]:
+        """Map each step index to the indices it depends on.
+
+        Dependencies are declared by tool class name in ``depends_on`` and
+        inferred from ``{{<ToolName>_output}}`` references in step inputs.
+        """
+        names = [tool.__class__.__name__ for tool in self.tools]
+        duplicates = {name for name in names if names.count(name) > 1}
+        if duplicates:
+            raise ValueError(f"DAG mode needs unique tool classes; repeated: {sorted(duplicates)}")
+        index_of = {name: index for index, name in enumerate(names)}
+        producers = {f"{name}_output": index for name, index in index_of.items()}
+
+        graph = {}
+        for index, tool in enumerate(self.tools):
+            deps = set()
+            for template in self._step_inputs(tool).values():
+                if isinstance(template, str) and template.startswith('{{') and template.endswith('}}'):
+                    key = template[2:-2].strip()
+                    if key in producers:
+                        deps.add(producers[key])
+            declared = self.depends_on.get(names[index], [])
+            if isinstance(declared, str):
+                declared = [declared]  # e.g. "depends_on": "Search" in a workflow file
+            for name in declared:
+                if name not in index_of:
+                    raise ValueError(f"{names[index]} depends on unknown step {name}")
+                deps.add(index_of[name])
+            deps.discard(index)
+            graph[index] = deps
+
+        # Reject cycles up front rather than deadlocking mid-run
+        remaining = {index: set(deps) for index, deps in graph.items()}
+        while remaining:
+            ready = [index for index, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Dependency cycle between steps: {sorted(names[i] for i in remaining)}")
+            for index in ready:
+                del remaining[index]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return graph
+
+    @staticmethod
+    def _timed_fn(tool, inputs):
+        start_time = time.time()
+        output = tool.fn(**inputs)
+        return output, time.time() - start_time
+
+    def _execute_dag(self, finished: set) -> ToolResult:
+        """Run steps as soon as their dependencies finish, up to ``max_workers`` at a time.
+
+        Workers only call ``tool.fn``. Inputs, the execution log, context data
+        and checkpoints are all handled on the calling thread, so journal
+        records never miss an entry appended mid-checkpoint.
+        """
+        graph = self._dependency_graph()
+        pending = {index for index in graph if index not in finished}
+        failure = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            running = {}
+            while pending or running:
+                if failure is None:
+                    for index in sorted(pending):
+                        if graph[index] <= finished:
+                            tool = self.tools[index]
+                            inputs = self._resolve_inputs(tool)
+                            future = executor.submit(self._timed_fn, tool, inputs)
+                            running[future] = (index, inputs)
+                            pending.discard(index)
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, inputs = running.pop(future)
+                    tool_name = self.tools[index].__class__.__name__
+                    try:
+                        output, duration = future.result()
+                    except Exception as e:
+                        failure = failure or ToolResult(success=False, output=None, error=f"{tool_name} failed: {e}",
+                                                        retryable=True)
+                        continue
+                    self.context.log_execution(
+                        tool_name=tool_name,
+                        duration=duration,
+                        input_data=inputs,
+                        output_data=output
+                    )
+                    self.context.data[f"{tool_name}_output"] = output
+                    self.context.save_checkpoint(f"after_{tool_name}")
+                    finished.add(index)
+
+        if failure is not None:
+            return failure
+        return ToolResult(
+            success=True,
+            output=self.context.data
+        )
+
+    def execute(self, initial_input: Dict[str, Any] = None, resume: bool = False, mode: str = "sequential",
+                checkpoint: str = None) -> ToolResult:
+        """Run the chain. ``resume`` skips steps recorded in the context's journal,
+        or in the named ``checkpoint`` for local and Firebase contexts."""
+        finished = set()
+        if resume:
+            checkpoint = self.context.load_checkpoint(checkpoint)
+            finished = self._finished_steps()
+            logger.info("Resuming from checkpoint %s; %d step(s) already finished", checkpoint, len(finished))
+
         self.context.data.update(initial_input or {})
 
-        for tool in self.tools:
+        if mode == "dag":
+            return self._execute_dag(finished)
+        if mode != "sequential":
+            raise ValueError(f"Unknown ToolChain mode: {mode}")
+
+        completed = 0
+        while completed in finished:
+            completed += 1
+
+        for tool in self.tools[completed:]:
             tool_name = tool.__class__.__name__
 
             # Resolve inputs from context
-            resolved_inputs = {
-                k: self._resolve_input(v)
-                for k, v in tool.definition.get('function', {}).get('parameters', {}).items()
-            }
+            resolved_inputs = self._resolve_inputs(tool)
 
             # Execute tool
             result = tool.execute(self.context, **resolved_inputs)
@@ -0,0 +1,154 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ("least_outstanding", "ewma", "round_robin")
+
+
+class Endpoint:
+    """One OpenAI-compatible endpoint in a pool, with its live routing state."""
+
+    def __init__(self, base_url, api_key, model_name=None, weight=1):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.model_name = model_name
+        self.weight = max(weight, 1)
+        self.outstanding = 0
+        self.ewma_latency = None
+        self.failures = 0
+        self.ejected_until = None
+        self.requests = 0
+        self.errors = 0
+        self._current_weight = 0  # smooth weighted round robin state
+
+    @property
+    def ejected(self):
+        return self.ejected_until is not None
+
+    def stats(self):
+        return {
+            "base_url": self.base_url,
+            "outstanding": self.outstanding,
+            "ewma_latency": self.ewma_latency,
+            "requests": self.requests,
+            "errors": self.errors,
+            "ejected": self.ejected
+        }
+
+
+class EndpointPool:
+    """Routes requests for one depth_chart level across equivalent endpoints.
+
+    ``policy`` picks among the admitted endpoints:
+
+    - ``"least_outstanding"``: fewest in-flight requests per unit of weight.
+    - ``"ewma"``: lowest exponentially weighted latency, scaled by in-flight
+      requests. Endpoints that have not answered yet are tried first.
+    - ``"round_robin"``: smooth weighted round robin by ``weight``.
+
+    After ``max_failures`` consecutive failures an endpoint is ejected for
+    ``eject_seconds``. Once that has passed, ``probe(endpoint)`` is called on a
+    background thread, so requests never wait for it, and the endpoint is
+    readmitted only if the probe returns True. A failed probe ejects it again. If every endpoint is ejected, the one due back soonest is
+    used rather than failing the call.
+    """
+
+    def __init__(self, endpoints, policy="least_outstanding", max_failures=2, eject_seconds=30.0,
+                 ewma_alpha=0.3, probe=None):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown load balancing policy {policy!r}; expected one of {POLICIES}")
+        if not endpoints:
+            raise ValueError("An endpoint pool needs at least one endpoint")
+        self.endpoints = list(endpoints)
+        self.policy = policy
+        self.max_failures = max_failures
+        self.eject_seconds = eject_seconds
+        self.ewma_alpha = ewma_alpha
+        self.probe = probe
+        self._lock = threading.Lock()
+
+    def _readmit_due(self, now):
+        """Start probing ejected endpoints whose ejection has expired; never waits for the probes."""
+        with self._lock:
+            due = [e for e in self.endpoints if e.ejected and e.ejected_until <= now]
+            for endpoint in due:
+                # Push the deadline out so concurrent callers don't probe the same endpoint
+                endpoint.ejected_until = now + self.eject_seconds
+        if not due:
+            return
+        if self.probe is None:
+            self._probe(due)
+        else:
+            threading.Thread(target=self._probe, args=(due,), name="endpoint-probe", daemon=True).start()
+
+    def _probe(self, endpoints):
+        for endpoint in endpoints:
+            try:
+                healthy = self.probe(endpoint) if self.probe is not None else True
+            except Exception as e:
+                logger.debug(f"Health probe for {endpoint.base_url} failed: {e}")
+                healthy = False
+            with self._lock:
+                if healthy:
+                    logger.info(f"Readmitting endpoint {endpoint.base_url}")
+                    endpoint.ejected_until = None
+                    endpoint.failures = 0
+                    endpoint.ewma_latency = None  # Relearn its latency from fresh traffic
+
+    def acquire(self, exclude=()):
+        """Pick an endpoint for a request and count it as in flight until ``release``."""
+        self._readmit_due(time.monotonic())
+        with self._lock:
+            candidates = [e for e in self.endpoints if not e.ejected and e not in exclude]
+            if not candidates:
+                fallback = [e for e in self.endpoints if e not in exclude] or self.endpoints
+                candidates = [min(fallback, key=lambda e: e.ejected_until or 0)]
+            endpoint = self._choose(candidates)
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def _choose(self, candidates):
+        if self.policy == "least_outstanding":
+            return min(candidates, key=lambda e: e.outstanding / e.weight)
+        if self.policy == "ewma":
+            unmeasured = [e for e in candidates if e.ewma_latency is None]
+            if unmeasured:
+                return min(unmeasured, key=lambda e: e.outstanding)
+            return min(candidates, key=lambda e: e.ewma_latency * (e.outstanding + 1) / e.weight)
+        total = sum(e.weight for e in candidates)
+        for endpoint in candidates:
+            endpoint._current_weight += endpoint.weight
+        chosen = max(candidates, key=lambda e: e._current_weight)
+        chosen._current_weight -= total
+        return chosen
+
+    def release(self, endpoint, latency=None, failed=False):
+        """Record the outcome of a request started with ``acquire``."""
+        with self._lock:
+            endpoint.outstanding -= 1
+            if failed:
+                endpoint.errors += 1
+                endpoint.failures += 1
+                if endpoint.failures >= self.max_failures and not endpoint.ejected:
+                    logger.warning(f"Ejecting endpoint {endpoint.base_url} after {endpoint.failures} failures")
+                    endpoint.ejected_until = time.monotonic() + self.eject_seconds
+                return
+            endpoint.failures = 0
+            if latency is not None:
+                endpoint.ewma_latency = latency if endpoint.ewma_latency is None else \
+                    self.ewma_alpha * latency + (1 - self.ewma_alpha) * endpoint.ewma_latency
+
+    def abandon(self, endpoint):
+        """End a request whose outcome says nothing about the endpoint's health, such as a 400.
+
+        The failure streak is left as it was, so it can neither eject nor clear the endpoint.
+        """
+        with self._lock:
+            endpoint.outstanding -= 1
+
+    def stats(self):
+        with self._lock:
+            return [endpoint.stats() for endpoint in self.endpoints]
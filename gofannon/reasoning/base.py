@@ -1,7 +1,16 @@
 from abc import ABC, abstractmethod
+import hashlib
 import json
-from openai import OpenAI
-from gofannon.base import BaseTool
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+from openai import OpenAI, DefaultHttpxClient, APIError, APIConnectionError, InternalServerError, RateLimitError
+from gofannon.base import BaseTool, CACHE_FOREVER
+from .balancer import Endpoint, EndpointPool
+
+logger = logging.getLogger(__name__)
 
 sample_depth_chart = [
     {'model_name' : "Qwen/Qwen2.5-72B-Instruct",
@@ -12,13 +21,128 @@ sample_depth_chart = [
      }
 ]
 
+class OpenAIClientCache:
+    """Process-wide cache of OpenAI clients keyed by ``(base_url, api_key)``.
+
+    Every reasoning tool and depth_chart level pointing at the same endpoint
+    shares one client, and with it one HTTP connection pool.
+    """
+
+    def __init__(self, max_connections=100, max_keepalive_connections=20):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def configure(self, max_connections=None, max_keepalive_connections=None):
+        """Change the pool limits. Cached clients are dropped so new ones pick them up."""
+        with self._lock:
+            if max_connections is not None:
+                self.max_connections = max_connections
+            if max_keepalive_connections is not None:
+                self.max_keepalive_connections = max_keepalive_connections
+            self._clients = {}
+
+    def get(self, base_url, api_key) -> OpenAI:
+        key = (base_url, api_key)
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    client = OpenAI(
+                        api_key=api_key,
+                        base_url=base_url,
+                        http_client=DefaultHttpxClient(limits=httpx.Limits(
+                            max_connections=self.max_connections,
+                            max_keepalive_connections=self.max_keepalive_connections
+                        ))
+                    )
+                    self._clients[key] = client
+        return client
+
+    def clear(self):
+        with self._lock:
+            self._clients = {}
+
+    def __len__(self):
+        return len(self._clients)
+
+
+client_cache = OpenAIClientCache()
+
+
+DEFAULT_LEVEL_CONCURRENCY = 4
+
+# Endpoint pools are shared process-wide so every tool sees the same ejections
+_endpoint_pools = {}
+_endpoint_pools_lock = threading.Lock()
+
+
+def _probe_endpoint(endpoint: Endpoint) -> bool:
+    """Health probe for an ejected endpoint: its model list must load."""
+    client = client_cache.get(base_url=endpoint.base_url, api_key=endpoint.api_key)
+    client.with_options(max_retries=0, timeout=5.0).models.list()
+    return True
+
+
+class CascadePolicy:
+    """Decides when a cheaper model's reply is good enough to keep.
+
+    A depth_chart level lists cheaper models under its ``'cascade'`` key (each a
+    dict with ``model_name`` and optionally ``base_url``, ``api_key`` and
+    ``temperature``, defaulting to the level's own). Calls that expect JSON try
+    those first and escalate to the next model, ending with the level's own,
+    when the reply is not JSON, lacks a required key, or self-reports a
+    ``score`` below ``min_score`` or a ``confidence`` below ``min_confidence``.
+    """
+
+    def __init__(self, min_score=None, min_confidence=None, score_key='score', confidence_key='confidence'):
+        self.min_score = min_score
+        self.min_confidence = min_confidence
+        self.score_key = score_key
+        self.confidence_key = confidence_key
+
+    def check(self, content, required_keys=()):
+        """Return ``None`` when the reply is acceptable, otherwise the reason to escalate."""
+        try:
+            data = json.loads(content or "")
+        except json.JSONDecodeError:
+            return "json_error"
+        if required_keys and (not isinstance(data, dict) or any(key not in data for key in required_keys)):
+            return "schema_mismatch"
+        if not isinstance(data, dict):
+            return None
+        for key, minimum, reason in ((self.score_key, self.min_score, "low_score"),
+                                     (self.confidence_key, self.min_confidence, "low_confidence")):
+            if minimum is None or key not in data:
+                continue
+            value = data[key]
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                return "schema_mismatch"
+            if value < minimum:
+                return reason
+        return None
+
 class ReasoningTool(BaseTool, ABC):
+    response_cache = None  # CacheBackend for chat completions; None disables response caching
+    response_cache_ttl = CACHE_FOREVER
+    cache_sampled_responses = False  # Also cache levels with temperature > 0
+    cascade_policy = None  # CascadePolicy; None always calls the level's own model
+
     def __init__(self,
                  depth_chart = sample_depth_chart
                  ):
         super().__init__()
         self.depth_chart = depth_chart
         self.error_context = []
+        self.response_cache_stats = {}
+        self._stats_lock = threading.Lock()
+        self._error_lock = threading.Lock()
+        self._level_semaphores = {}
+        self._semaphore_lock = threading.Lock()
+        self.cascade_stats = {}
+        self._primary_latency = {}  # Running average latency of each level's own model
         self.jsonify_prompt_s = "Your output should be a properly formatted JSON only. No preamble, explanations, or markdown ticks (```)."
 
 
@@ -27,21 +151,236 @@ class ReasoningTool(BaseTool, ABC):
         pass
 
     def create_openai_like_client(self, level: int):
-        return OpenAI(
-            api_key=self.depth_chart[level]['api_key'],
-            base_url=self.depth_chart[level]['base_url']
-        )
-
-    def get_response(self, level: int, messages):
-        return self.create_openai_like_client(level).chat.completions.create(
-            model=self.depth_chart[level]['model_name'],
-            messages=messages,
-            temperature=self.depth_chart[level]['temperature']
-        )
+        config = self.depth_chart[level]
+        if 'base_url' not in config:
+            raise ValueError(
+                f"depth_chart level {level} has no 'base_url'"
+                + (" and balances across 'endpoints'; use get_response or endpoint_pool(level)"
+                   if config.get('endpoints') else "")
+            )
+        return client_cache.get(base_url=config['base_url'], api_key=config['api_key'])
+
+    def endpoint_pool(self, level: int) -> EndpointPool:
+        """The shared EndpointPool for a level configured with an ``'endpoints'`` list."""
+        config = self.depth_chart[level]
+        key = json.dumps({
+            "endpoints": config['endpoints'],
+            "api_key": config.get('api_key'),
+            "balancer": config.get('balancer', 'least_outstanding'),
+            "max_failures": config.get('max_failures', 2),
+            "eject_seconds": config.get('eject_seconds', 30.0)
+        }, sort_keys=True, default=str)
+        with _endpoint_pools_lock:
+            pool = _endpoint_pools.get(key)
+            if pool is None:
+                pool = EndpointPool(
+                    [Endpoint(e['base_url'], e.get('api_key', config.get('api_key')), e.get('model_name'),
+                              e.get('weight', 1)) for e in config['endpoints']],
+                    policy=config.get('balancer', 'least_outstanding'),
+                    max_failures=config.get('max_failures', 2),
+                    eject_seconds=config.get('eject_seconds', 30.0),
+                    probe=_probe_endpoint
+                )
+                _endpoint_pools[key] = pool
+            return pool
+
+    def create_endpoint_client(self, endpoint: Endpoint) -> OpenAI:
+        # The pool fails over itself, so the client should not retry the same endpoint
+        return client_cache.get(base_url=endpoint.base_url, api_key=endpoint.api_key).with_options(max_retries=0)
+
+    def create_cascade_client(self, level: int, config):
+        level_config = self.depth_chart[level]
+        base_url = config.get('base_url', level_config.get('base_url'))
+        if base_url is None:
+            raise ValueError(
+                f"Cascade model {config.get('model_name')!r} on depth_chart level {level} needs a 'base_url', "
+                "since the level itself has none"
+            )
+        return client_cache.get(base_url=base_url, api_key=config.get('api_key', level_config.get('api_key')))
+
+    def _record_error(self, entry):
+        """Append to error_context; safe to call from worker threads."""
+        with self._error_lock:
+            self.error_context.append(entry)
+
+    def level_concurrency(self, level: int) -> int:
+        """Maximum in-flight requests for a depth_chart level (its 'max_concurrency' key)."""
+        if level >= len(self.depth_chart):
+            return DEFAULT_LEVEL_CONCURRENCY
+        return max(1, self.depth_chart[level].get('max_concurrency', DEFAULT_LEVEL_CONCURRENCY))
+
+    def _level_semaphore(self, level: int) -> threading.BoundedSemaphore:
+        with self._semaphore_lock:
+            semaphore = self._level_semaphores.get(level)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.level_concurrency(level))
+                self._level_semaphores[level] = semaphore
+            return semaphore
+
+    def map_concurrently(self, level: int, fn, items):
+        """Apply fn to items on a thread pool sized by the level's concurrency limit.
+
+        Results come back in input order. get_response also holds a per-level
+        semaphore, so nested calls at deeper levels stay within their own limits.
+        """
+        items = list(items)
+        workers = min(len(items), self.level_concurrency(level))
+        if workers <= 1:
+            return [fn(item) for item in items]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(fn, items))
+
+    def _response_cache_key(self, level: int, messages, n: int = 1):
+        """Exact-match key for a completion, or None when this level must not be cached."""
+        if self.response_cache is None:
+            return None
+        config = self.depth_chart[level]
+        temperature = config.get('temperature')
+        if temperature and temperature > 0 and not self.cache_sampled_responses:
+            return None
+        request = {
+            "model_name": config['model_name'],
+            "base_url": config.get('base_url'),
+            "messages": [
+                {"role": m["role"], "content": (m.get("content") or "").strip()}
+                for m in messages
+            ],
+            "temperature": temperature
+        }
+        if n != 1:
+            request["n"] = n
+        if config.get('endpoints'):
+            request["endpoints"] = [e['base_url'] for e in config['endpoints']]
+        payload = json.dumps(request, sort_keys=True)
+        return "chat:" + hashlib.sha256(payload.encode()).hexdigest()
+
+    def _record_cache_result(self, level: int, hit: bool):
+        with self._stats_lock:
+            stats = self.response_cache_stats.setdefault(level, {"hits": 0, "misses": 0})
+            stats["hits" if hit else "misses"] += 1
+
+    def _record_cascade(self, stage, new_call=False, reason=None, escalated=False, saved=0.0):
+        with self._stats_lock:
+            stats = self.cascade_stats.setdefault(
+                stage, {"calls": 0, "escalations": 0, "escalation_rate": 0.0, "reasons": {}, "latency_saved": 0.0})
+            if new_call:
+                stats["calls"] += 1
+            if reason is not None:
+                stats["reasons"][reason] = stats["reasons"].get(reason, 0) + 1
+            if escalated:
+                stats["escalations"] += 1
+            stats["escalation_rate"] = stats["escalations"] / max(stats["calls"], 1)
+            stats["latency_saved"] += saved
+
+    def _cascade_response(self, level: int, messages, expect_json, stage):
+        """Try the level's cheaper models in order; None means escalate to the level's own model."""
+        self._record_cascade(stage, new_call=True)
+        for config in self.depth_chart[level].get('cascade', []):
+            start = time.perf_counter()
+            try:
+                with self._level_semaphore(level):
+                    response = self.create_cascade_client(level, config).chat.completions.create(
+                        model=config['model_name'],
+                        messages=messages,
+                        temperature=config.get('temperature', self.depth_chart[level]['temperature'])
+                    )
+                reason = self.cascade_policy.check(response.choices[0].message.content, expect_json) \
+                    if response.choices else "empty_response"
+            except APIError as e:
+                response, reason = None, f"api_error_{getattr(e, 'status_code', None)}"
+            elapsed = time.perf_counter() - start
+            primary = self._primary_latency.get(level)
+            if reason is None:
+                # Saved time is measured against the level's own model, once it has been timed
+                self._record_cascade(stage, saved=max(primary - elapsed, 0.0) if primary else 0.0)
+                return response
+            logger.debug(f"Escalating {stage} past {config['model_name']}: {reason}")
+            self._record_cascade(stage, reason=reason, saved=-elapsed)
+        self._record_cascade(stage, escalated=True)
+        return None
+
+    def get_response(self, level: int, messages, n: int = 1, expect_json=None, stage=None):
+        """Chat completion from a depth_chart level; ``n > 1`` asks for that many choices in one call.
+
+        ``expect_json`` (a tuple of required keys, possibly empty) marks a call
+        whose reply must be JSON, which lets ``cascade_policy`` answer it with the
+        level's cheaper models first. ``stage`` names the call in ``cascade_stats``.
+        """
+        cache_key = self._response_cache_key(level, messages, n)
+        if cache_key is not None:
+            hit, response = self.response_cache.lookup(cache_key)
+            self._record_cache_result(level, hit)
+            if hit:
+                return response
+
+        response = None
+        if (self.cascade_policy is not None and expect_json is not None and n == 1
+                and self.depth_chart[level].get('cascade')):
+            response = self._cascade_response(level, messages, tuple(expect_json), stage or f"level_{level}")
+
+        if response is None:
+            # Only send n when sampling, since some OpenAI-compatible endpoints reject it
+            sampling = {"n": n} if n != 1 else {}
+            start = time.perf_counter()
+            response = self._create_completion(level, messages, **sampling)
+            elapsed = time.perf_counter() - start
+            with self._stats_lock:
+                previous = self._primary_latency.get(level)
+                self._primary_latency[level] = elapsed if previous is None else 0.8 * previous + 0.2 * elapsed
+
+        if cache_key is not None:
+            self.response_cache.store(cache_key, response, self.response_cache_ttl)
+        return response
+
+    def _create_completion(self, level: int, messages, **kwargs):
+        """Call the level's own model, failing over across its endpoint pool if it has one."""
+        config = self.depth_chart[level]
+        if not config.get('endpoints'):
+            with self._level_semaphore(level):
+                return self.create_openai_like_client(level).chat.completions.create(
+                    model=config['model_name'],
+                    messages=messages,
+                    temperature=config['temperature'],
+                    **kwargs
+                )
+
+        pool = self.endpoint_pool(level)
+        tried = []
+        while True:
+            endpoint = pool.acquire(exclude=tried)
+            tried.append(endpoint)
+            start = time.perf_counter()
+            try:
+                with self._level_semaphore(level):
+                    response = self.create_endpoint_client(endpoint).chat.completions.create(
+                        model=endpoint.model_name or config['model_name'],
+                        messages=messages,
+                        temperature=config['temperature'],
+                        **kwargs
+                    )
+            except (APIConnectionError, InternalServerError, RateLimitError) as e:
+                pool.release(endpoint, failed=True)
+                if len(tried) >= len(pool.endpoints):
+                    raise
+                logger.debug(f"Endpoint {endpoint.base_url} failed ({type(e).__name__}); trying another")
+                continue
+            except Exception:
+                pool.abandon(endpoint)
+                raise
+            pool.release(endpoint, latency=time.perf_counter() - start)
+            return response
+
+    def endpoint_stats(self):
+        """Routing state of each level's endpoint pool, keyed by level."""
+        return {level: self.endpoint_pool(level).stats()
+                for level, config in enumerate(self.depth_chart) if config.get('endpoints')}
 
     def get_debug_info(self):
         """Get current debugging information"""
         return {
             "error_context": self.error_context,
-            "depth_chart_config": self.depth_chart
+            "depth_chart_config": self.depth_chart,
+            "response_cache_stats": self.response_cache_stats,
+            "cascade_stats": self.cascade_stats,
+            "endpoint_stats": self.endpoint_stats()
         }
\ No newline at end of file
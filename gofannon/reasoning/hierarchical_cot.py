@@ -1,18 +1,41 @@
 import json
 import logging
+import queue
+import threading
 from openai import OpenAI, APIError
 from.base import ReasoningTool
 from ..config import FunctionRegistry
 
 logger = logging.getLogger(__name__)
 
+
+class _NodeStream:
+    """Carries node events from a background HierarchicalCoT run to iter_fn."""
+
+    def __init__(self):
+        self.events = queue.Queue()
+        self.cancelled = threading.Event()
+
+    def emit(self, event_type, index_path, title_path, node, final, error=None):
+        self.events.put({
+            "type": event_type,
+            "index_path": tuple(index_path),
+            "path": list(title_path),
+            "node": node,
+            "final": final,
+            "error": error
+        })
+
+
 @FunctionRegistry.register
 class HierarchicalCoT(ReasoningTool):
-    def __init__(self, depth_chart= None):
+    def __init__(self, depth_chart= None, expansion= "per_section", batch_size= None):
         super().__init__(depth_chart=depth_chart)
         self.name = "hierarchical_cot"
         self.depth_chart = depth_chart or []
         self.error_context = []  # Track error locations
+        self.expansion = expansion  # "per_section" or "batched" (one request per tree level)
+        self.batch_size = batch_size  # Max sections per batched request; None sends a whole level
 
     @property
     def definition(self):
@@ -40,6 +63,42 @@ class HierarchicalCoT(ReasoningTool):
         }
 
     def fn(self, prompt, depth=2):
+        return self._run(prompt, depth)
+
+    def iter_fn(self, prompt, depth=2):
+        """Yield node events while the hierarchy is generated.
+
+        Each event is a dict with ``type`` ("outline" for the root, "section" for
+        an expanded section, "result" for the finished tree), ``index_path`` (the
+        section indices from the root), ``path`` (the titles from the root),
+        ``node``, ``final`` and ``error``. A ``final`` node will not be expanded
+        further, so its whole subtree is complete. ``error`` is set on a section
+        whose expansion failed; it is emitted as it was in the outline. Sections are yielded as they finish, which
+        with concurrent expansion is not document order; feed the events to
+        ``iter_markdown`` for ordered output. Closing the generator early stops
+        further model calls.
+        """
+        stream = _NodeStream()
+
+        def run():
+            try:
+                result = self._run(prompt, depth, stream=stream)
+            except Exception as e:
+                result = {"error": "HierarchicalCoT processing failed", "exception": str(e)}
+            stream.emit("result", (), [], result, True)
+
+        worker = threading.Thread(target=run, daemon=True)
+        worker.start()
+        try:
+            while True:
+                event = stream.events.get()
+                yield event
+                if event["type"] == "result":
+                    break
+        finally:
+            stream.cancelled.set()
+
+    def _run(self, prompt, depth, stream=None):
         self.error_context = []  # Reset error tracking
         if depth > len(self.depth_chart):
             return {"error": f"Requested depth {depth} exceeds configured model levels {len(self.depth_chart)}"}
@@ -51,8 +110,13 @@ class HierarchicalCoT(ReasoningTool):
             outline = self._generate_outline(prompt, depth)
             if 'error' in outline:
                 return outline
+            if stream is not None:
+                stream.emit("outline", (), [outline.get('title', 'Untitled Section')], outline,
+                            final=depth <= 1 or not outline.get('sections'))
 
-            return self._expand_sections(outline, current_depth=1, max_depth=depth)
+            if self.expansion == "batched":
+                return self._expand_levels_batched(outline, max_depth=depth, stream=stream)
+            return self._expand_sections(outline, current_depth=1, max_depth=depth, stream=stream)
 
         except Exception as e:
             logger.error(f"Critical failure: {str(e)}")
@@ -74,12 +138,13 @@ class HierarchicalCoT(ReasoningTool):
                 outline_prompt += "Each section should have 'title' and 'sections'. "
 
             messages = [{"role": "user", "content": outline_prompt}]
-            response = self.get_response(level=0, messages=messages)
+            response = self.get_response(level=0, messages=messages, expect_json=('title', 'sections'),
+                                         stage="outline")
 
             try:
                 structure = json.loads(response.choices[0].message.content)
             except json.JSONDecodeError as e:
-                self.error_context.append({
+                self._record_error({
                     "stage": "outline_parsing",
                     "response": response.choices[0].message.content,
                     "error": str(e)
@@ -88,7 +153,7 @@ class HierarchicalCoT(ReasoningTool):
 
                 # Validate outline structure
             if not isinstance(structure, dict):
-                self.error_context.append({
+                self._record_error({
                     "stage": "outline_validation",
                     "structure_type": type(structure).__name__,
                     "expected_type": "dict"
@@ -97,7 +162,7 @@ class HierarchicalCoT(ReasoningTool):
 
             required_keys = {'title', 'sections'}
             if not required_keys.issubset(structure.keys()):
-                self.error_context.append({
+                self._record_error({
                     "stage": "outline_validation",
                     "missing_keys": list(required_keys - structure.keys())
                 })
@@ -106,7 +171,7 @@ class HierarchicalCoT(ReasoningTool):
             return structure
 
         except APIError as e:
-            self.error_context.append({
+            self._record_error({
                 "stage": "outline_generation",
                 "error_type": "APIError",
                 "status_code": e.status_code,
@@ -115,14 +180,14 @@ class HierarchicalCoT(ReasoningTool):
             return {"error": "API failure during outline generation"}
 
         except Exception as e:
-            self.error_context.append({
+            self._record_error({
                 "stage": "outline_generation",
                 "error_type": type(e).__name__,
                 "message": str(e)
             })
             return {"error": "Unexpected error during outline generation"}
 
-    def _expand_sections(self, node, current_depth, max_depth, path=None):
+    def _expand_sections(self, node, current_depth, max_depth, path=None, index_path=(), stream=None):
         if path is None:
             path = []
 
@@ -132,7 +197,7 @@ class HierarchicalCoT(ReasoningTool):
             return node
 
         if current_depth >= len(self.depth_chart):
-            self.error_context.append({
+            self._record_error({
                 "stage": "depth_validation",
                 "current_depth": current_depth,
                 "max_configured_depth": len(self.depth_chart)-1
@@ -140,106 +205,24 @@ class HierarchicalCoT(ReasoningTool):
             raise ValueError("Current depth exceeds configured model depth chart")
 
         try:
-            client = self.create_openai_like_client(current_depth)
             expanded = node.copy()
 
             if 'sections' in node:
-                for i, section in enumerate(node['sections']):
-                    logger.debug(f"Expanding section {i+1}/{len(node['sections'])} at depth {current_depth}")
-
-                    next_depth = current_depth + 1
-                    is_final_depth = next_depth == max_depth
-
-                    # Generate appropriate prompt based on depth
-                    if is_final_depth:
-                        expansion_prompt = f"""Expand this section within the context of: {" -> ".join(current_path)}    
-                          
-                        Section to expand: {section['title']}      
-                        Current depth: {current_depth}/{max_depth}      
-                          
-                        Provide detailed content for this section. The content should be a concise explanation.  
-                        Your output should be a properly formatted JSON only with a 'content' field.   
-                        No preamble, explanations, or markdown ticks (```). """
-                    else:
-                        expansion_prompt = f"""Expand this section within the context of: {" -> ".join(current_path)}    
-                          
-                        Section to expand: {section['title']}      
-                        Current depth: {current_depth}/{max_depth}      
-                          
-                        Provide detailed sub-sections in JSON format with 'title' and 'sections'.    
-                        Your output should be a properly formatted JSON only. No preamble, explanations, or markdown ticks (```). """
-
-                    try:
-                        response = client.chat.completions.create(
-                            model=self.depth_chart[current_depth]['model_name'],
-                            messages=[{"role": "user", "content": expansion_prompt}],
-                            temperature=self.depth_chart[current_depth]['temperature']
-                        )
-                    except APIError as e:
-                        self.error_context.append({
-                            "stage": f"section_expansion_depth_{current_depth}",
-                            "section_index": i,
-                            "section_title": section.get('title'),
-                            "error_type": "APIError",
-                            "status_code": e.status_code,
-                            "message": e.message
-                        })
-                        continue
-
-                    if not response.choices:
-                        self.error_context.append({
-                            "stage": f"section_expansion_depth_{current_depth}",
-                            "section_index": i,
-                            "error": "Empty API response"
-                        })
-                        continue
-
-                    try:
-                        expanded_section = json.loads(response.choices[0].message.content)
-                    except json.JSONDecodeError as e:
-                        self.error_context.append({
-                            "stage": f"section_parsing_depth_{current_depth}",
-                            "section_index": i,
-                            "response": response.choices[0].message.content,
-                            "error": str(e)
-                        })
-                        continue
-
-                        # Handle content generation for final depth
-                    if is_final_depth:
-                        if 'content' not in expanded_section:
-                            self.error_context.append({
-                                "stage": f"content_validation_depth_{current_depth}",
-                                "section_index": i,
-                                "response": expanded_section
-                            })
-                            continue
-
-                            # Update section with content and remove subsections
-                        expanded['sections'][i]['content'] = expanded_section['content']
-                        if 'sections' in expanded['sections'][i]:
-                            del expanded['sections'][i]['sections']
-                    else:
-                        # Validate section structure and recursively expand
-                        if not isinstance(expanded_section, dict) or 'title' not in expanded_section:
-                            self.error_context.append({
-                                "stage": f"section_validation_depth_{current_depth}",
-                                "section_index": i,
-                                "response_structure": type(expanded_section).__name__
-                            })
-                            continue
-
-                        expanded['sections'][i] = self._expand_sections(
-                            expanded_section,
-                            next_depth,
-                            max_depth,
-                            current_path
-                        )
+                # Siblings expand concurrently, bounded by this level's max_concurrency;
+                # results come back in the original section order
+                sections = node['sections']
+                expanded['sections'] = self.map_concurrently(
+                    current_depth,
+                    lambda indexed: self._expand_section(indexed[1], indexed[0], len(sections),
+                                                         current_path, current_depth, max_depth,
+                                                         index_path + (indexed[0],), stream),
+                    enumerate(sections)
+                )
 
             return expanded
 
         except Exception as e:
-            self.error_context.append({
+            self._record_error({
                 "stage": f"section_expansion_depth_{current_depth}",
                 "error_type": type(e).__name__,
                 "message": str(e),
@@ -247,26 +230,306 @@ class HierarchicalCoT(ReasoningTool):
             })
             raise
 
-    def get_debug_info(self):
-        return {
-            "error_context": self.error_context,
-            "depth_chart_config": self.depth_chart
-        }
+    def _expansion_prompt(self, section, current_path, current_depth, max_depth):
+        if current_depth + 1 == max_depth:
+            return f"""Expand this section within the context of: {" -> ".join(current_path)}    
+              
+            Section to expand: {section['title']}      
+            Current depth: {current_depth}/{max_depth}      
+              
+            Provide detailed content for this section. The content should be a concise explanation.  
+            Your output should be a properly formatted JSON only with a 'content' field.   
+            No preamble, explanations, or markdown ticks (```). """
+        return f"""Expand this section within the context of: {" -> ".join(current_path)}    
+          
+        Section to expand: {section['title']}      
+        Current depth: {current_depth}/{max_depth}      
+          
+        Provide detailed sub-sections in JSON format with 'title' and 'sections'.    
+        Your output should be a properly formatted JSON only. No preamble, explanations, or markdown ticks (```). """
+
+    def _expand_section(self, section, i, count, current_path, current_depth, max_depth,
+                        index_path=(), stream=None):
+        """Expand one section and its subtree; failures leave the section unexpanded."""
+        logger.debug(f"Expanding section {i+1}/{count} at depth {current_depth}")
+
+        if stream is not None and stream.cancelled.is_set():
+            return section
+
+        node, expanded = self._expand_one(section, i, current_path, current_depth, max_depth)
+        final = not expanded or current_depth + 1 == max_depth or not node.get('sections')
+        if stream is not None:
+            stream.emit("section", index_path, current_path + [node.get('title', 'Untitled Section')],
+                        node, final, error=None if expanded else "Expansion failed")
+        if final:
+            return node
 
-    def to_markdown(self, output):
-        def _to_markdown(node, level=1):
-            markdown = ""
+        return self._expand_sections(
+            node,
+            current_depth + 1,
+            max_depth,
+            current_path,
+            index_path,
+            stream
+        )
+
+    def _expand_one(self, section, i, current_path, current_depth, max_depth):
+        """Request one section's expansion without recursing.
+
+        Returns ``(node, expanded)``; on failure the error is recorded and the
+        original section is returned with ``expanded`` False.
+        """
+        expansion_prompt = self._expansion_prompt(section, current_path, current_depth, max_depth)
+
+        try:
+            response = self.get_response(
+                level=current_depth,
+                messages=[{"role": "user", "content": expansion_prompt}],
+                expect_json=('content',) if current_depth + 1 == max_depth else ('title',),
+                stage=f"section_expansion_depth_{current_depth}"
+            )
+        except APIError as e:
+            self._record_error({
+                "stage": f"section_expansion_depth_{current_depth}",
+                "section_index": i,
+                "section_title": section.get('title'),
+                "error_type": "APIError",
+                "status_code": getattr(e, 'status_code', None),
+                "message": e.message
+            })
+            return section, False
+
+        if not response.choices:
+            self._record_error({
+                "stage": f"section_expansion_depth_{current_depth}",
+                "section_index": i,
+                "error": "Empty API response"
+            })
+            return section, False
+
+        try:
+            expanded_section = json.loads(response.choices[0].message.content)
+        except json.JSONDecodeError as e:
+            self._record_error({
+                "stage": f"section_parsing_depth_{current_depth}",
+                "section_index": i,
+                "response": response.choices[0].message.content,
+                "error": str(e)
+            })
+            return section, False
+
+        return self._apply_expansion(section, expanded_section, i, current_depth, max_depth)
+
+    def _apply_expansion(self, section, expanded_section, i, current_depth, max_depth):
+        """Validate a parsed expansion and merge it into the section, as ``(node, expanded)``."""
+            # Handle content generation for final depth
+        if current_depth + 1 == max_depth:
+            if not isinstance(expanded_section, dict) or 'content' not in expanded_section:
+                self._record_error({
+                    "stage": f"content_validation_depth_{current_depth}",
+                    "section_index": i,
+                    "response": expanded_section
+                })
+                return section, False
+
+                # Update section with content and remove subsections
+            section = {**section, 'content': expanded_section['content']}
+            section.pop('sections', None)
+            return section, True
+
+        # Validate section structure before it is expanded further
+        if not isinstance(expanded_section, dict) or 'title' not in expanded_section:
+            self._record_error({
+                "stage": f"section_validation_depth_{current_depth}",
+                "section_index": i,
+                "response_structure": type(expanded_section).__name__
+            })
+            return section, False
+
+        return expanded_section, True
 
-            if 'title' in node:
-                title = node['title']
-                markdown += f"{'#' * level} {title}\n\n"
+    def _batched_expansion_prompt(self, items, current_depth, max_depth):
+        listing = "\n".join(
+            f"[{n}] {' -> '.join(item['path'] + [item['section']['title']])}"
+            for n, item in enumerate(items)
+        )
+        if current_depth + 1 == max_depth:
+            shape = "an object with a 'content' field holding a concise explanation of that section"
+        else:
+            shape = "an object with 'title' and 'sections' (an array of sub-section objects, each with a 'title')"
+        return f"""Expand each of the following sections of a hierarchical outline. Each line gives a
+section number followed by the path from the outline root to the section.
 
-            if 'content' in node:
-                markdown += f"{node['content']}\n\n"
+{listing}
+
+Current depth: {current_depth}/{max_depth}
+
+Return a JSON object whose keys are the section numbers as strings ("0", "1", ...) and whose
+values are {shape}.
+{self.jsonify_prompt_s}"""
+
+    def _expand_batch(self, items, current_depth, max_depth):
+        """Expand several sections with one request; sections that fail fall back to their own request."""
+        results = [None] * len(items)
+        try:
+            response = self.get_response(
+                level=current_depth,
+                messages=[{"role": "user", "content": self._batched_expansion_prompt(items, current_depth, max_depth)}],
+                expect_json=(),
+                stage=f"batch_expansion_depth_{current_depth}"
+            )
+            parsed = json.loads(response.choices[0].message.content)
+            if isinstance(parsed, list):
+                parsed = {str(n): value for n, value in enumerate(parsed)}
+            if not isinstance(parsed, dict):
+                raise ValueError(f"Expected a JSON object, got {type(parsed).__name__}")
+        except (APIError, json.JSONDecodeError, ValueError, IndexError, AttributeError) as e:
+            self._record_error({
+                "stage": f"batch_expansion_depth_{current_depth}",
+                "error_type": type(e).__name__,
+                "message": str(e),
+                "sections": len(items)
+            })
+            parsed = {}
+
+        fallback = []
+        for n, item in enumerate(items):
+            if str(n) in parsed:
+                node, expanded = self._apply_expansion(item['section'], parsed[str(n)], item['index'],
+                                                       current_depth, max_depth)
+                if expanded:
+                    results[n] = (node, True)
+                    continue
+            fallback.append(n)
+
+        if fallback:
+            logger.debug(f"Falling back to per-section expansion for {len(fallback)} of {len(items)} sections")
+            retried = self.map_concurrently(
+                current_depth,
+                lambda n: self._expand_one(items[n]['section'], items[n]['index'], items[n]['path'],
+                                           current_depth, max_depth),
+                fallback
+            )
+            for n, result in zip(fallback, retried):
+                results[n] = result
+        return results
+
+    def _expand_levels_batched(self, outline, max_depth, stream=None):
+        """Expand the tree breadth-first with one request per level (or per ``batch_size`` sections)."""
+        root = dict(outline)
+        # Nodes whose sections are expanded at the current level, with their title and index paths
+        frontier = [(root, [root.get('title', 'Untitled Section')], ())]
+
+        for current_depth in range(1, max_depth):
+            if current_depth >= len(self.depth_chart):
+                self._record_error({
+                    "stage": "depth_validation",
+                    "current_depth": current_depth,
+                    "max_configured_depth": len(self.depth_chart)-1
+                })
+                raise ValueError("Current depth exceeds configured model depth chart")
+
+            items = []
+            for parent, path, index_path in frontier:
+                parent['sections'] = list(parent.get('sections', []))
+                for i, section in enumerate(parent['sections']):
+                    items.append({"parent": parent, "index": i, "section": section,
+                                  "path": path, "index_path": index_path + (i,)})
+            if not items or (stream is not None and stream.cancelled.is_set()):
+                break
+
+            batch_size = self.batch_size or len(items)
+            batches = [items[start:start + batch_size] for start in range(0, len(items), batch_size)]
+            logger.debug(f"Expanding {len(items)} sections at depth {current_depth} in {len(batches)} request(s)")
+            results = [
+                result
+                for batch_results in self.map_concurrently(
+                    current_depth, lambda batch: self._expand_batch(batch, current_depth, max_depth), batches)
+                for result in batch_results
+            ]
+
+            frontier = []
+            for item, (node, expanded) in zip(items, results):
+                final = not expanded or current_depth + 1 == max_depth or not node.get('sections')
+                item['parent']['sections'][item['index']] = node if final else dict(node)
+                if stream is not None:
+                    stream.emit("section", item['index_path'],
+                                item['path'] + [node.get('title', 'Untitled Section')], node, final,
+                                error=None if expanded else "Expansion failed")
+                if not final:
+                    frontier.append((item['parent']['sections'][item['index']],
+                                     item['path'] + [node.get('title', 'Untitled Section')],
+                                     item['index_path']))
+
+        return root
+
+    @staticmethod
+    def _node_markdown(node, level):
+        markdown = ""
+
+        if 'title' in node:
+            title = node['title']
+            markdown += f"{'#' * level} {title}\n\n"
+
+        if 'content' in node:
+            markdown += f"{node['content']}\n\n"
+
+        return markdown
+
+    def to_markdown(self, output):
+        def _to_markdown(node, level=1):
+            markdown = self._node_markdown(node, level)
 
             if 'sections' in node:
                 for section in node['sections']:
                     markdown += _to_markdown(section, level + 1)
 
             return markdown
-        return _to_markdown(output)
\ No newline at end of file
+        return _to_markdown(output)
+
+    def iter_markdown(self, events):
+        """Render ``iter_fn`` events as markdown chunks in document order.
+
+        A node is emitted as soon as it and everything before it in the document
+        is known, so the first chunk follows the outline call. For a successful
+        run the concatenated chunks equal ``to_markdown`` of the final result.
+        Failures are shown rather than dropped: a section whose expansion failed
+        gets an italic note under its heading, and if the run fails its error is
+        emitted after whatever had been rendered.
+        """
+        known = {}
+
+        def lookup(index_path):
+            if index_path in known:
+                return known[index_path]
+            if not index_path:
+                return None
+            # Descendants of a final node arrive with it rather than as their own events
+            parent = lookup(index_path[:-1])
+            if parent is None or not parent[1]:
+                return None
+            return parent[0]['sections'][index_path[-1]], True, None
+
+        pending = [()]
+        for event in events:
+            if event['type'] == 'result':
+                result = event['node']
+                if isinstance(result, dict) and 'error' in result:
+                    details = f": {result['exception']}" if result.get('exception') else ""
+                    yield f"*{result['error']}{details}*\n\n"
+                break
+            known[event['index_path']] = (event['node'], event['final'], event.get('error'))
+
+            while pending:
+                entry = lookup(pending[-1])
+                if entry is None:
+                    break
+                index_path = pending.pop()
+                node, _, error = entry
+                chunk = self._node_markdown(node, len(index_path) + 1)
+                if error:
+                    chunk += f"*{error}*\n\n"
+                if chunk:
+                    yield chunk
+                for i in reversed(range(len(node.get('sections', [])))):
+                    pending.append(index_path + (i,))
@@ -1,4 +1,5 @@
 import json
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from openai import OpenAI
 from gofannon.reasoning.base import ReasoningTool
 from ..config import FunctionRegistry
@@ -8,11 +9,18 @@ logger = logging.getLogger(__name__)
 
 @FunctionRegistry.register
 class SequentialCoT(ReasoningTool):
-    def __init__(self, depth_chart= None, steps= 5):
+    def __init__(self, depth_chart= None, steps= 5, context= "full", window= 3, summary_level= 0,
+                 prefix_stable= False, mode= "sequential"):
         super().__init__(depth_chart= depth_chart)
         self.name = "sequential_cot"
         self.depth_chart = depth_chart or []
         self.steps = steps
+        self.context = context  # "full", "window" (last `window` steps) or "summary" (older steps summarized)
+        self.window = max(1, window)
+        self.summary_level = summary_level  # depth_chart level used to summarize evicted steps
+        self.prefix_stable = prefix_stable  # Evict a whole window at a time so the prompt prefix changes rarely
+        self.token_usage = []  # Prompt tokens sent per call of the last run
+        self.mode = mode  # "sequential" (strict chain) or "dag" (planner declares dependencies)
 
 
     @property
@@ -40,8 +48,19 @@ class SequentialCoT(ReasoningTool):
         }
 
     def fn(self, prompt, steps):
-        logger.debug(f"Starting SequentialCoT with {steps} steps")
-        modified_prompt = prompt + f"""
+        logger.debug(f"Starting SequentialCoT with {steps} steps ({self.mode})")
+        if self.mode == "dag":
+            modified_prompt = prompt + f"""
+
+Given the prompt above, return a plan of about {steps} steps required to arrive at an answer.
+Do not attempt to compute the answer now, only return the steps required to solve the problem,
+as prompts to future LLM calls. Steps that do not need each other's results will run in parallel.
+Your response should be a properly formatted json with one field `steps` which contains an array of
+objects, each with an integer `id`, a `prompt` string, and a `depends_on` array listing the ids of
+the steps whose results it needs. Do not include any explanations or ticks to indicate it is a
+markdown code block."""
+        else:
+            modified_prompt = prompt + f"""
         
 Given the prompt above, return a series of {steps} steps required to arrive at an answer. 
 Do not attempt to compute the answer now, only return the series of steps 
@@ -52,26 +71,178 @@ response should be a properly formatted json with one field `steps` which contai
 
         messages = [{"role": "user", "content": modified_prompt}]
 
-        response = self.get_response(level= 0 , messages= messages)
-        messages= [
+        self.token_usage = []
+        response = self.get_response(level= 0 , messages= messages, expect_json=('steps',), stage="plan")
+        self._record_tokens("plan", messages, response)
+        # The prompt and plan never change, so they lead every later request
+        prefix = [
             {'role': 'user', 'content': prompt},
             {'role' : 'assistant', 'content':response.choices[0].message.content}
         ]
 
         try:
             steps = json.loads(response.choices[0].message.content)["steps"]
-            step_output = []
+            if self.mode == "dag":
+                return self._run_graph(prefix, steps)
+            history = []  # (step, output) pairs still sent verbatim
+            summary = None
             for i in range(len(steps)):
                 logger.debug(f"Executing Step {i+1}/{len(steps)}:'{steps[i]}'...")
+                history, summary = self._bound_context(history, summary)
+                messages = self._context_messages(prefix, history, summary)
                 messages.append({'role': 'user', 'content': steps[i]})
 
                 response = self.get_response(level= 1, messages= messages)
-                step_output.append(response.choices[0].message.content)
-                messages.append({'role': 'assistant', 'content': response.choices[0].message.content})
+                self._record_tokens(f"step_{i+1}", messages, response)
+                history.append((steps[i], response.choices[0].message.content))
+            history, summary = self._bound_context(history, summary)
+            messages = self._context_messages(prefix, history, summary)
             messages.append({'role': 'user', 'content': self.depth_chart[2]['prompt_appendix']})
             logger.debug('Synthesizing Response')
             response = self.get_response(level = 2, messages= messages)
+            self._record_tokens("synthesis", messages, response)
             return response
         except json.JSONDecodeError:
             return {"error": "Failed to decode the response as JSON."}
 
+    @staticmethod
+    def _plan_graph(plan):
+        """Normalize a dependency plan into ``(prompts, deps)`` keyed by step position.
+
+        Plain strings (a chain-style plan) depend on the previous step. Ids are
+        matched as strings, and ``depends_on`` may be a list, a single id, a
+        comma-separated string or null. Unknown ids are ignored, and a cycle
+        raises ``ValueError``.
+        """
+        ids = {}
+        for position, step in enumerate(plan):
+            if isinstance(step, dict):
+                ids.setdefault(str(step.get('id', position + 1)).strip(), position)
+        prompts, deps = [], {}
+        for position, step in enumerate(plan):
+            if isinstance(step, dict):
+                prompts.append(step.get('prompt') or step.get('step') or json.dumps(step))
+                depends_on = step.get('depends_on')
+                if depends_on is None:
+                    depends_on = []
+                elif isinstance(depends_on, str):
+                    depends_on = depends_on.split(',')
+                elif not isinstance(depends_on, (list, tuple)):
+                    depends_on = [depends_on]
+                deps[position] = {ids[str(d).strip()] for d in depends_on if str(d).strip() in ids} - {position}
+            else:
+                prompts.append(str(step))
+                deps[position] = {position - 1} if position else set()
+
+        remaining = {position: set(d) for position, d in deps.items()}
+        while remaining:
+            ready = [position for position, d in remaining.items() if not d]
+            if not ready:
+                raise ValueError(f"Dependency cycle between steps: {sorted(remaining)}")
+            for position in ready:
+                del remaining[position]
+            for d in remaining.values():
+                d.difference_update(ready)
+        return prompts, deps
+
+    def _run_graph(self, prefix, plan):
+        """Run each step at level 1 once its dependencies finish, then synthesize at level 2.
+
+        A step's request holds the prompt, the plan and the outputs of its direct
+        dependencies, in plan order.
+        """
+        try:
+            prompts, deps = self._plan_graph(plan)
+        except ValueError as e:
+            logger.error(str(e))
+            return {"error": str(e)}
+
+        outputs = {}
+        pending = set(deps)
+
+        def run_step(position):
+            logger.debug(f"Executing Step {position+1}/{len(prompts)}:'{prompts[position]}'...")
+            messages = self._context_messages(
+                prefix, [(prompts[d], outputs[d]) for d in sorted(deps[position])], None)
+            messages.append({'role': 'user', 'content': prompts[position]})
+            response = self.get_response(level= 1, messages= messages)
+            self._record_tokens(f"step_{position+1}", messages, response)
+            return response.choices[0].message.content
+
+        with ThreadPoolExecutor(max_workers=self.level_concurrency(1)) as executor:
+            running = {}
+            while pending or running:
+                # outputs is only written here, so workers read finished dependencies safely
+                for position in sorted(pending):
+                    if deps[position] <= outputs.keys():
+                        running[executor.submit(run_step, position)] = position
+                        pending.discard(position)
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    outputs[running.pop(future)] = future.result()
+
+        messages = self._context_messages(prefix, [(prompts[p], outputs[p]) for p in range(len(prompts))], None)
+        messages.append({'role': 'user', 'content': self.depth_chart[2]['prompt_appendix']})
+        logger.debug('Synthesizing Response')
+        response = self.get_response(level = 2, messages= messages)
+        self._record_tokens("synthesis", messages, response)
+        return response
+
+    def _bound_context(self, history, summary):
+        """Apply the context strategy before a request, returning the new ``(history, summary)``."""
+        if self.context == "full":
+            return history, summary
+        # A prefix-stable window lets up to 2*window-1 steps accumulate and then
+        # evicts `window` of them at once, so most requests extend the previous one
+        limit = 2 * self.window - 1 if self.prefix_stable else self.window
+        if len(history) <= limit:
+            return history, summary
+        keep = self.window if self.prefix_stable else limit
+        evicted, history = history[:-keep], history[-keep:]
+        if self.context == "summary":
+            summary = self._summarize(summary, evicted)
+        return history, summary
+
+    def _summarize(self, summary, evicted):
+        logger.debug(f"Summarizing {len(evicted)} evicted steps at level {self.summary_level}")
+        steps_text = "\n\n".join(f"Step: {step}\nResult: {output}" for step, output in evicted)
+        messages = [{'role': 'user', 'content': f"""Update the running summary of a multi-step solution.
+
+Current summary:
+{summary or '(none yet)'}
+
+Steps completed since the last summary:
+{steps_text}
+
+Return the updated summary as plain text. Keep every fact, number and conclusion later steps may need,
+and drop everything else."""}]
+        response = self.get_response(level= self.summary_level, messages= messages)
+        self._record_tokens("summary", messages, response)
+        return response.choices[0].message.content
+
+    @staticmethod
+    def _context_messages(prefix, history, summary):
+        messages = list(prefix)
+        if summary:
+            messages.append({'role': 'user', 'content': f"Summary of the earlier steps:\n{summary}"})
+            messages.append({'role': 'assistant', 'content': "Noted."})
+        for step, output in history:
+            messages.append({'role': 'user', 'content': step})
+            messages.append({'role': 'assistant', 'content': output})
+        return messages
+
+    def _record_tokens(self, stage, messages, response):
+        """Record prompt tokens sent, from the response's usage or estimated at ~4 characters per token."""
+        usage = getattr(response, 'usage', None)
+        if usage is not None and usage.prompt_tokens is not None:
+            tokens, estimated = usage.prompt_tokens, False
+        else:
+            tokens, estimated = sum(len(m['content'] or '') for m in messages) // 4, True
+        with self._stats_lock:
+            self.token_usage.append({"stage": stage, "prompt_tokens": tokens, "estimated": estimated,
+                                     "messages": len(messages)})
+        logger.debug(f"{stage}: {tokens} prompt tokens in {len(messages)} messages")
+
+    def get_debug_info(self):
+        return {**super().get_debug_info(), "token_usage": self.token_usage}
+
@@ -1,5 +1,6 @@
 import json
 import logging
+import re
 from openai import OpenAI, APIError
 from .base import ReasoningTool
 from ..config import FunctionRegistry
@@ -8,10 +9,13 @@ logger = logging.getLogger(__name__)
 
 @FunctionRegistry.register
 class TreeOfThought(ReasoningTool):
-    def __init__(self, depth_chart= None):
+    def __init__(self, depth_chart= None, evaluation= "per_branch", generation= "json", duplicate_threshold= 0.8):
         super().__init__(depth_chart=depth_chart)
         self.name = "tree_of_thought"
         self.depth_chart = depth_chart or []
+        self.evaluation = evaluation  # "per_branch" or "comparative" (all branches scored in one request)
+        self.generation = generation  # "json" (one array of approaches) or "sampled" (n completions, one per branch)
+        self.duplicate_threshold = duplicate_threshold  # Word-overlap ratio at which sampled branches count as duplicates
 
     @property
     def definition(self):
@@ -36,6 +40,25 @@ class TreeOfThought(ReasoningTool):
                             "type": "integer",
                             "description": "Depth of evaluation steps (default: 2)",
                             "default": 2
+                        },
+                        "search": {
+                            "type": "string",
+                            "description": "'exhaustive' evaluates every branch to full depth; 'beam' keeps only the top branches at each level (default: exhaustive)",
+                            "enum": ["exhaustive", "beam"],
+                            "default": "exhaustive"
+                        },
+                        "beam_width": {
+                            "type": "integer",
+                            "description": "Branches kept per level in beam search (default: 2)",
+                            "default": 2
+                        },
+                        "score_threshold": {
+                            "type": "integer",
+                            "description": "Beam search stops once a branch scores at least this much (0-10)"
+                        },
+                        "max_calls": {
+                            "type": "integer",
+                            "description": "Maximum model calls for a beam search run"
                         }
                     },
                     "required": ["prompt"]
@@ -43,18 +66,25 @@ class TreeOfThought(ReasoningTool):
             }
         }
 
-    def fn(self, prompt, branches=3, evaluation_depth=2):
-        logger.debug(f"Tree of Thought. {branches} branches. {evaluation_depth} depth.")
+    def fn(self, prompt, branches=3, evaluation_depth=2, search="exhaustive", beam_width=2,
+           score_threshold=None, max_calls=None):
+        logger.debug(f"Tree of Thought. {branches} branches. {evaluation_depth} depth. {search} search.")
         self.error_context = []  # Reset error tracking
         try:
             if 0 >= len(self.depth_chart):
-                self.error_context.append({
+                self._record_error({
                     "stage": "initialization",
                     "error": "No models configured in depth_chart"
                 })
                 return {"error": "No models configured in depth_chart"}
 
                 # Generate initial thought branches
+            if self.generation == "sampled":
+                parsed_branches = self._sample_branches(prompt, branches)
+                if parsed_branches is not None:
+                    return self._select(prompt, parsed_branches, branches, evaluation_depth, search,
+                                        beam_width, score_threshold, max_calls)
+
             messages = [{
                 "role": "user",
                 "content": f"Generate {branches} distinct approaches to solve:"
@@ -64,7 +94,7 @@ class TreeOfThought(ReasoningTool):
                            f"{self.jsonify_prompt_s}"
             }]
 
-            response = self._safe_get_response(0, messages, "initial_branch_generation")
+            response = self._safe_get_response(0, messages, "initial_branch_generation", expect_json=())
             if "error" in response:
                 return response
 
@@ -72,23 +102,12 @@ class TreeOfThought(ReasoningTool):
             if "error" in parsed_branches:
                 return parsed_branches
 
-                # Evaluate and select best branches
-            evaluated = []
-            for i, branch in enumerate(parsed_branches.get('branches', [])):
-                evaluated_branch = self._evaluate_branch(branch, evaluation_depth, branch_index=i)
-                evaluated.append(evaluated_branch)
-
-            sorted_branches = sorted(evaluated, key=lambda x: x.get('score', 0), reverse=True)
-
-            return {
-                "best_branch": sorted_branches[0] if sorted_branches else None,
-                "all_branches": sorted_branches,
-                "debug_info": self.get_debug_info()  # Include debug info in response
-            }
+            return self._select(prompt, parsed_branches, branches, evaluation_depth, search,
+                                beam_width, score_threshold, max_calls)
 
         except Exception as e:
             logger.error(f"Critical failure: {str(e)}", exc_info=True)
-            self.error_context.append({
+            self._record_error({
                 "stage": "fn_execution",
                 "error_type": type(e).__name__,
                 "message": str(e)
@@ -100,6 +119,198 @@ class TreeOfThought(ReasoningTool):
                 "debug_info": self.get_debug_info()  # Include debug info in error response
             }
 
+    def _select(self, prompt, parsed_branches, branches, evaluation_depth, search, beam_width,
+                score_threshold, max_calls):
+        """Evaluate the generated branches and return them sorted by score."""
+        if search == "beam":
+            return self._beam_search(prompt, parsed_branches.get('branches', []),
+                                     evaluation_depth, beam_width, score_threshold, max_calls)
+
+        if self.evaluation == "comparative":
+            evaluated, _ = self._compare_branches(parsed_branches.get('branches', []))
+            if evaluation_depth > 1:
+                analyses = self.map_concurrently(
+                    2, lambda indexed: self._deep_analysis(indexed[1], indexed[0]), enumerate(evaluated)
+                )
+                for evaluation, analysis in zip(evaluated, analyses):
+                    evaluation['deeper_analysis'] = analysis
+        else:
+            # Evaluate branches concurrently (bounded by level 1's max_concurrency) and select the best
+            evaluated = self.map_concurrently(
+                1,
+                lambda indexed: self._evaluate_branch(indexed[1], evaluation_depth, branch_index=indexed[0]),
+                enumerate(parsed_branches.get('branches', []))
+            )
+
+        sorted_branches = sorted(evaluated, key=lambda x: x.get('score', 0), reverse=True)
+
+        return {
+            "best_branch": sorted_branches[0] if sorted_branches else None,
+            "all_branches": sorted_branches,
+            "debug_info": self.get_debug_info()  # Include debug info in response
+        }
+
+    def _sample_branches(self, prompt, branches):
+        """Generate branches as ``n`` independent completions of one request.
+
+        Returns ``None`` when the endpoint rejects ``n`` or returns a single
+        choice for several, so the caller can fall back to JSON generation.
+        """
+        messages = [{
+            "role": "user",
+            "content": f"Propose one distinct approach to solve:"
+                       f"{prompt}\n\n"
+                       "Reply with the approach only, in a few sentences. No preamble or markdown."
+        }]
+        try:
+            response = self.get_response(0, messages, n=branches)
+        except APIError as e:
+            self._record_error({
+                "stage": "sampled_branch_generation",
+                "error_type": "APIError",
+                "status_code": getattr(e, 'status_code', None),
+                "message": e.message
+            })
+            return None
+
+        descriptions = [(choice.message.content or "").strip() for choice in response.choices]
+        descriptions = [d for d in descriptions if d]
+        if branches > 1 and len(descriptions) <= 1:
+            logger.debug("Endpoint returned a single choice for n > 1; falling back to JSON generation")
+            return None
+
+        unique = self._drop_near_duplicates(descriptions, self.duplicate_threshold)
+        logger.debug(f"Sampled {len(descriptions)} branches, {len(unique)} after removing near-duplicates")
+        return {"branches": [{'description': d} for d in unique]}
+
+    @staticmethod
+    def _drop_near_duplicates(descriptions, threshold):
+        """Keep the first of any descriptions whose word sets overlap by ``threshold`` or more (Jaccard)."""
+        kept = []
+        for description in descriptions:
+            words = set(re.findall(r"\w+", description.lower()))
+            if all(len(words & seen) / (len(words | seen) or 1) < threshold for _, seen in kept):
+                kept.append((description, words))
+        return [description for description, _ in kept]
+
+    def _beam_search(self, prompt, initial_branches, levels, beam_width, score_threshold, max_calls):
+        """Expand the tree level by level, keeping the ``beam_width`` best branches at each level.
+
+        Every candidate at a level is scored (level 1 of the depth_chart); only the
+        survivors are refined (level 0), between them into at most ``beam_width``
+        candidates for the next level, and only the final beam gets
+        ``_deep_analysis`` (level 2). With per-branch scoring a run therefore makes
+        at most ``1 + len(initial_branches) + (levels - 1) * 2 * beam_width +
+        beam_width`` calls. The search stops early once a branch reaches
+        ``score_threshold`` or the ``max_calls`` budget (which includes the
+        initial generation call) runs out.
+        """
+        calls = 1  # initial branch generation
+
+        def allowance(wanted):
+            if max_calls is None:
+                return wanted
+            return max(0, min(wanted, max_calls - calls))
+
+        candidates = [{**b, "depth": 1} for b in initial_branches]
+        scored = []
+        beam = []
+        stopped = "depth"
+
+        for level in range(1, max(levels, 1) + 1):
+            if self.evaluation == "comparative":
+                if not allowance(1):
+                    stopped = "budget"
+                    break
+                evaluated, used = self._compare_branches(
+                    candidates, index_prefix=f"{level}.",
+                    max_fallbacks=None if max_calls is None else max_calls - calls - 1
+                )
+                calls += used
+            else:
+                # Only score as many candidates as the budget still allows
+                candidates = candidates[:allowance(len(candidates))]
+                if not candidates:
+                    stopped = "budget"
+                    break
+                calls += len(candidates)
+                evaluated = self.map_concurrently(
+                    1,
+                    lambda indexed: self._evaluate_branch(indexed[1], 1, branch_index=f"{level}.{indexed[0]}"),
+                    enumerate(candidates)
+                )
+            scored.extend(evaluated)
+            beam = sorted(beam + evaluated, key=lambda x: x.get('score', 0), reverse=True)[:beam_width]
+            logger.debug(f"Beam level {level}: {len(evaluated)} scored, kept {[b.get('score', 0) for b in beam]}")
+
+            if score_threshold is not None and beam and beam[0].get('score', 0) >= score_threshold:
+                stopped = "threshold"
+                break
+            if level == levels:
+                break
+
+            # Refine each surviving branch into the next level's candidates
+            expandable = [b for b in beam if "children" not in b]
+            expandable = expandable[:allowance(len(expandable))]
+            calls += len(expandable)
+            # Split the next level's beam_width candidates across the survivors
+            per_branch = -(-beam_width // len(expandable)) if expandable else 0
+            children = self.map_concurrently(
+                0, lambda branch: self._refine_branch(prompt, branch, per_branch, level)[:per_branch], expandable
+            )
+            for branch, refined in zip(expandable, children):
+                branch["children"] = len(refined)
+            # Interleave so every survivor, best first, contributes before any gets a second child
+            candidates = [refined[rank] for rank in range(per_branch) for refined in children
+                          if rank < len(refined)][:beam_width]
+            if not candidates:
+                if max_calls is not None and calls >= max_calls:
+                    stopped = "budget"
+                break
+
+        # Deep analysis is reserved for the surviving beam
+        if levels > 1:
+            analysed = beam[:allowance(len(beam))]
+            calls += len(analysed)
+            analyses = self.map_concurrently(
+                2, lambda indexed: self._deep_analysis(indexed[1], f"beam_{indexed[0]}"), enumerate(analysed)
+            )
+            for branch, analysis in zip(analysed, analyses):
+                branch['deeper_analysis'] = analysis
+            if len(analysed) < len(beam):
+                stopped = "budget"
+
+        sorted_branches = sorted(scored, key=lambda x: x.get('score', 0), reverse=True)
+        return {
+            "best_branch": beam[0] if beam else None,
+            "all_branches": sorted_branches,
+            "search": {"mode": "beam", "calls": calls, "stopped": stopped,
+                       "levels": max((b["depth"] for b in scored), default=0)},
+            "debug_info": self.get_debug_info()
+        }
+
+    def _refine_branch(self, prompt, branch, branches, level):
+        messages = [{
+            "role": "user",
+            "content": f"Refine this approach into {branches} more specific, improved approaches to solve:"
+                       f"{prompt}\n\n"
+                       f"Approach: {branch.get('description', branch)}\n"
+                       f"Strengths: {branch.get('strengths', [])}\n"
+                       f"Weaknesses: {branch.get('weaknesses', [])}\n"
+                       f"Next steps: {branch.get('next_steps', [])}\n\n"
+                       f"Your output MUST be a JSON object containing a 'branches' key with an array of {branches} approach strings."
+                       f"{self.jsonify_prompt_s}"
+        }]
+        response = self._safe_get_response(0, messages, f"beam_expansion_{level}", expect_json=(),
+                                           cascade_stage="beam_expansion")
+        if "error" in response:
+            return []
+        parsed = self._parse_branches(response)
+        if "error" in parsed:
+            return []
+        return [{**child, "depth": level + 1, "parent": branch.get('description')}
+                for child in parsed.get('branches', [])]
+
     # Update the _parse_branches method to handle different structures:
     def _parse_branches(self, response):
         try:
@@ -141,7 +352,7 @@ class TreeOfThought(ReasoningTool):
                 return data
 
             except json.JSONDecodeError as e:
-                self.error_context.append({
+                self._record_error({
                     "stage": "branch_parsing",
                     "response": content,
                     "error": str(e)
@@ -149,7 +360,7 @@ class TreeOfThought(ReasoningTool):
                 return {"error": "Invalid JSON structure in branches"}
 
         except AttributeError as e:
-            self.error_context.append({
+            self._record_error({
                 "stage": "branch_generation",
                 "error_type": "AttributeError",
                 "message": str(e)
@@ -168,7 +379,8 @@ class TreeOfThought(ReasoningTool):
             - next_steps (array)\n\n{self.jsonify_prompt_s}"""
 
             response = self._safe_get_response(1, [{"role": "user", "content": evaluation_prompt}],
-                                               f"branch_evaluation_{branch_index}")
+                                               f"branch_evaluation_{branch_index}", expect_json=('score',),
+                                               cascade_stage="branch_evaluation")
             if "error" in response:
                 return {**branch, "score": 0, "error": response["error"]}
 
@@ -177,7 +389,7 @@ class TreeOfThought(ReasoningTool):
                 if not isinstance(evaluation.get('score', 0), int):
                     raise ValueError("Score must be integer")
             except (json.JSONDecodeError, ValueError) as e:
-                self.error_context.append({
+                self._record_error({
                     "stage": f"evaluation_parsing_{branch_index}",
                     "response": response.choices[0].message.content,
                     "error": str(e)
@@ -190,13 +402,78 @@ class TreeOfThought(ReasoningTool):
             return {**branch, **evaluation}
 
         except Exception as e:
-            self.error_context.append({
+            self._record_error({
                 "stage": f"branch_evaluation_{branch_index}",
                 "error_type": type(e).__name__,
                 "message": str(e)
             })
             return {**branch, "score": 0, "error": "Evaluation failed"}
 
+    def _compare_branches(self, branches, index_prefix="", max_fallbacks=None):
+        """Score all branches in one request so their scores are relative to each other.
+
+        Returns ``(evaluated, calls)``. Entries are matched to branches by their
+        ``index`` only when those are exactly ``0..n-1``, otherwise by position
+        when there is one entry per branch. Branches left unmatched (all of them
+        if neither holds) or with a malformed entry are scored with their own
+        ``_evaluate_branch`` call, at most ``max_fallbacks`` of them; the rest
+        keep a score of 0.
+        """
+        listing = "\n".join(f"[{i}] {b.get('description', b)}" for i, b in enumerate(branches))
+        comparison_prompt = f"""Compare these solution approaches against each other:    
+            {listing}    
+              
+            Score every approach (0-10) relative to the others and return a JSON object with an
+            'evaluations' array holding one object per approach, in the same order, with:    
+            - index (integer)    
+            - score (integer)    
+            - strengths (array)    
+            - weaknesses (array)    
+            - next_steps (array)\n\n{self.jsonify_prompt_s}"""
+
+        evaluations = {}
+        response = self._safe_get_response(1, [{"role": "user", "content": comparison_prompt}],
+                                           f"comparative_evaluation_{index_prefix}", expect_json=('evaluations',),
+                                           cascade_stage="comparative_evaluation")
+        if "error" not in response:
+            try:
+                data = json.loads(response.choices[0].message.content)
+                entries = data.get('evaluations', []) if isinstance(data, dict) else data
+                if not isinstance(entries, list):
+                    raise ValueError("Evaluations should be a list")
+                indexes = [entry.get('index') if isinstance(entry, dict) else None for entry in entries]
+                if all(isinstance(i, int) for i in indexes) and sorted(indexes) == list(range(len(branches))):
+                    matched = zip(indexes, entries)
+                elif len(entries) == len(branches):
+                    matched = enumerate(entries)  # e.g. 1-based indexes; trust the order instead
+                else:
+                    raise ValueError(f"Got {len(entries)} evaluations for {len(branches)} approaches")
+                for index, entry in matched:
+                    if isinstance(entry, dict) and isinstance(entry.get('score'), int):
+                        entry.pop('index', None)
+                        evaluations[index] = entry
+            except (json.JSONDecodeError, ValueError, AttributeError) as e:
+                self._record_error({
+                    "stage": f"comparative_evaluation_parsing_{index_prefix}",
+                    "response": response.choices[0].message.content,
+                    "error": str(e)
+                })
+
+        missing = [i for i in range(len(branches)) if i not in evaluations]
+        if max_fallbacks is not None:
+            missing, skipped = missing[:max(max_fallbacks, 0)], missing[max(max_fallbacks, 0):]
+            for i in skipped:
+                evaluations[i] = {"score": 0, "error": "Not evaluated: call budget exhausted"}
+        if missing:
+            logger.debug(f"Falling back to per-branch evaluation for {len(missing)} of {len(branches)} branches")
+            fallback = self.map_concurrently(
+                1, lambda i: self._evaluate_branch(branches[i], 1, branch_index=f"{index_prefix}{i}"), missing
+            )
+            for i, evaluated in zip(missing, fallback):
+                evaluations[i] = evaluated
+
+        return [{**branch, **evaluations[i]} for i, branch in enumerate(branches)], 1 + len(missing)
+
     def _deep_analysis(self, evaluation, branch_index):
         try:
             analysis_prompt = f"""Perform deep analysis on:    
@@ -213,7 +490,7 @@ class TreeOfThought(ReasoningTool):
             try:
                 return json.loads(response.choices[0].message.content)
             except json.JSONDecodeError as e:
-                self.error_context.append({
+                self._record_error({
                     "stage": f"deep_analysis_parsing_{branch_index}",
                     "response": response.choices[0].message.content,
                     "error": str(e)
@@ -221,26 +498,27 @@ class TreeOfThought(ReasoningTool):
                 return {"error": "Deep analysis parsing failed"}
 
         except Exception as e:
-            self.error_context.append({
+            self._record_error({
                 "stage": f"deep_analysis_{branch_index}",
                 "error_type": type(e).__name__,
                 "message": str(e)
             })
             return {"error": "Deep analysis failed"}
 
-    def _safe_get_response(self, level, messages, context_stage):
+    def _safe_get_response(self, level, messages, context_stage, expect_json=None, cascade_stage=None):
         try:
             if level >= len(self.depth_chart):
                 error_msg = f"Level {level} not configured in depth_chart"
-                self.error_context.append({
+                self._record_error({
                     "stage": context_stage,
                     "error": error_msg
                 })
                 return {"error": error_msg}
 
-            return self.get_response(level=level, messages=messages)
+            return self.get_response(level=level, messages=messages, expect_json=expect_json,
+                                     stage=cascade_stage or context_stage)
         except APIError as e:
-            self.error_context.append({
+            self._record_error({
                 "stage": context_stage,
                 "error_type": "APIError",
                 "status_code": e.status_code,
@@ -248,7 +526,7 @@ class TreeOfThought(ReasoningTool):
             })
             return {"error": f"API Error: {e.message}"}
         except Exception as e:
-            self.error_context.append({
+            self._record_error({
                 "stage": context_stage,
                 "error_type": type(e).__name__,
                 "message": str(e)
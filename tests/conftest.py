@@ -1,7 +1,72 @@
+import gzip
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
 import pytest
 from gofannon.base import BaseTool
 from gofannon.config import FunctionRegistry
 
 @pytest.fixture
 def tools():
-    return [tool_class() for tool_class in FunctionRegistry._tools.values()]
\ No newline at end of file
+    return [tool_class() for tool_class in FunctionRegistry._tools.values()]
+
+
+class StandInServer:
+    """Local HTTP server answering from ``routes``, a map of path to handler.
+
+    A handler receives the request handler instance and returns
+    ``(status, body)`` or ``(status, body, headers)``. Every request is
+    recorded in ``requests`` as ``(method, path_with_query)``.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _dispatch(self):
+                path = self.path.split('?')[0]
+                server.requests.append((self.command, self.path))
+                length = int(self.headers.get('Content-Length') or 0)
+                self.body = self.rfile.read(length) if length else b""
+                handler = server.routes.get(path)
+                if handler is None:
+                    status, body, headers = 404, b"not found", {}
+                else:
+                    status, body, *rest = handler(self)
+                    headers = rest[0] if rest else {}
+                if isinstance(body, str):
+                    body = body.encode()
+                if 'gzip' in self.headers.get('Accept-Encoding', ''):
+                    body = gzip.compress(body)
+                    headers = {**headers, 'Content-Encoding': 'gzip'}
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = do_PUT = _dispatch
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def stand_in_server():
+    server = StandInServer()
+    yield server
+    server.close()
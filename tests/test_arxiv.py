@@ -9,4 +9,312 @@ def test_get_article():
 def test_search():
     search = Search()
     results = search.fn("machine learning")
-    assert results is not None
\ No newline at end of file
+    assert results is not None
+
+def atom_feed(ids, total=None, abstract="An abstract.", categories=("cs.LG", "stat.ML")):
+    """A minimal arXiv Atom feed with one entry per ``id`` (e.g. ``"2101.00001v2"``)."""
+    category_xml = "".join(f'\n    <category term="{c}" scheme="http://arxiv.org/schemas/atom"/>' for c in categories)
+    entries = "".join(f"""
+  <entry>
+    <id>http://arxiv.org/abs/{arxiv_id}</id>
+    <updated>2021-01-02T00:00:00Z</updated>
+    <published>2021-01-01T00:00:00Z</published>
+    <title>Paper {arxiv_id}</title>
+    <summary>  {abstract}
+    </summary>
+    <author><name>Ada Lovelace</name></author>
+    <author><name>Alan Turing</name></author>
+    <link href="http://arxiv.org/abs/{arxiv_id}" rel="alternate" type="text/html"/>
+    <link title="pdf" href="http://arxiv.org/pdf/{arxiv_id}" rel="related" type="application/pdf"/>
+    <arxiv:primary_category term="{categories[0]}" scheme="http://arxiv.org/schemas/atom"/>{category_xml}
+  </entry>""" for arxiv_id in ids)
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/"
+      xmlns:arxiv="http://arxiv.org/schemas/atom">
+  <title type="html">ArXiv Query</title>
+  <opensearch:totalResults>{len(ids) if total is None else total}</opensearch:totalResults>
+  <opensearch:startIndex>0</opensearch:startIndex>{entries}
+</feed>"""
+
+
+def offline(tool, server):
+    from gofannon.base import HttpTransport
+    tool.transport = HttpTransport(host_overrides={"export.arxiv.org": server.url})
+    tool.cache_ttl = None
+    return tool
+
+
+def test_search_returns_compact_records(stand_in_server):
+    import asyncio
+    from gofannon.arxiv.atom import AtomParser
+    feed = atom_feed(["2101.00001v2", "2101.00002v1"], total=42, abstract="word " * 400)
+    stand_in_server.routes['/api/query'] = lambda request: (200, feed)
+    search = offline(Search(), stand_in_server)
+
+    records = search.fn("machine learning", max_results=2, output="records")
+    assert records[0] == {
+        "id": "2101.00001", "title": "Paper 2101.00001v2", "authors": ["Ada Lovelace", "Alan Turing"],
+        "published": "2021-01-01T00:00:00Z", "categories": ["cs.LG", "stat.ML"],
+        "summary": ("word " * 100).strip() + "..."}
+    assert len(str(records)) * 3 < len(feed)
+    assert asyncio.run(search.afn("machine learning", output="records", fields=["id", "version", "pdf_url"])) == [
+        {"id": "2101.00001", "version": "v2", "pdf_url": "http://arxiv.org/pdf/2101.00001v2"},
+        {"id": "2101.00002", "version": "v1", "pdf_url": "http://arxiv.org/pdf/2101.00002v1"}]
+    assert search.fn("machine learning") == feed
+
+    parser = AtomParser()
+    data = feed.encode()
+    records = [r for i in range(0, len(data), 100) for r in parser.feed(data[i:i + 100])] + parser.close()
+    assert len(records) == 2 and parser.total_results == 42
+    assert len(parser._root) == 3  # title and opensearch elements only; entries are dropped once parsed
+
+    get_article = offline(GetArticle(), stand_in_server)
+    assert get_article.fn("2101.00001", output="records", fields=["id", "title"]) == {"id": "2101.00001", "title": "Paper 2101.00001v2"}
+
+    from requests import HTTPError
+    stand_in_server.routes['/api/query'] = lambda request: (503, "Service Unavailable")
+    with pytest.raises(HTTPError):
+        search.fn("machine learning", output="records")
+
+
+def test_search_iterator_pages_prefetches_and_stops_early(stand_in_server):
+    import itertools
+    import time
+    from urllib.parse import parse_qs, urlsplit
+    from gofannon.arxiv.rate_limit import RateLimiter
+
+    def page(request):
+        query = parse_qs(urlsplit(request.path).query)
+        start, count = int(query["start"][0]), int(query["max_results"][0])
+        return 200, atom_feed([f"2101.{i:05d}v1" for i in range(start, min(start + count, 250))], total=250)
+
+    stand_in_server.routes['/api/query'] = page
+    search = offline(Search(), stand_in_server)
+
+    began = time.monotonic()
+    records = list(search.iter_results("machine learning", page_size=100, rate_limiter=RateLimiter(0.05)))
+    assert [r["id"] for r in records] == [f"2101.{i:05d}" for i in range(250)]
+    assert len(stand_in_server.requests) == 3
+    assert time.monotonic() - began >= 0.1
+
+    stand_in_server.requests.clear()
+    results = search.iter_results("machine learning", page_size=100, rate_limiter=RateLimiter(0))
+    assert len(list(itertools.islice(results, 150))) == 150
+    results.close()
+    time.sleep(0.05)
+    assert len(stand_in_server.requests) <= 3  # at most one page fetched ahead
+
+    stand_in_server.requests.clear()
+    records = list(search.iter_results("machine learning", start=20, max_results=130, page_size=100,
+                                       rate_limiter=RateLimiter(0), prefetch=False))
+    assert len(records) == 130
+    assert [r.split("?")[1] for _, r in stand_in_server.requests] == [
+        "search_query=machine+learning&start=20&max_results=100",
+        "search_query=machine+learning&start=120&max_results=30"]
+
+
+def test_get_article_batches_concurrent_lookups(stand_in_server):
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    from urllib.parse import parse_qs, urlsplit
+    from gofannon.arxiv import GetArticles
+
+    def by_id(request):
+        ids = parse_qs(urlsplit(request.path).query)["id_list"][0].split(",")
+        return 200, atom_feed([f"{i.split('v')[0]}v3" for i in ids if not i.startswith("9999")])
+
+    stand_in_server.routes['/api/query'] = by_id
+    get_article = offline(GetArticle(), stand_in_server)
+    get_article.batch_window = 0.05
+    ids = [f"2101.{i:05d}" for i in range(5)] + ["9999.00000"]
+
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        articles = list(executor.map(lambda i: get_article.fn(i, output="records", fields=["id", "version"]), ids))
+    assert articles == [{"id": i, "version": "v3"} for i in ids[:5]] + [None]
+    assert len(stand_in_server.requests) == 1
+
+    async def gather():
+        return await asyncio.gather(*(get_article.afn(i, output="records", fields=["id"]) for i in ["2101.00007v3", "2101.00008"]))
+    assert asyncio.run(gather()) == [{"id": "2101.00007"}, {"id": "2101.00008"}]
+    assert len(stand_in_server.requests) == 2
+
+    get_articles = offline(GetArticles(), stand_in_server)
+    get_articles.max_batch = 2
+    assert get_articles.fn(["2101.00001", "9999.00000", "2101.00002v3"], fields=["id"]) == [
+        {"id": "2101.00001"}, None, {"id": "2101.00002"}]
+    assert len(stand_in_server.requests) == 4
+
+
+def test_get_article_batches_across_per_call_tool_instances(stand_in_server, monkeypatch):
+    import json
+    from types import SimpleNamespace
+    from urllib.parse import parse_qs, urlsplit
+    from gofannon.base import HttpTransport, get_transport, set_transport
+    from gofannon.orchestration import FunctionOrchestrator
+
+    def by_id(request):
+        return 200, atom_feed([f"{i}v1" for i in parse_qs(urlsplit(request.path).query)["id_list"][0].split(",")])
+
+    stand_in_server.routes['/api/query'] = by_id
+    monkeypatch.setattr(GetArticle, "cache_ttl", None)
+    monkeypatch.setattr(GetArticle, "batch_window", 0.1)
+    previous = get_transport()
+    set_transport(HttpTransport(host_overrides={"export.arxiv.org": stand_in_server.url}))
+    try:
+        calls = [SimpleNamespace(id=f"call_{i}", function=SimpleNamespace(
+            name="get_article", arguments=json.dumps({"id": f"2105.{i:05d}", "output": "records", "fields": ["id"]}))) for i in range(4)]
+        orchestrator = FunctionOrchestrator(llm_client=None, max_concurrency=4)
+        messages = orchestrator._run_tool_calls(calls, max_concurrency=4)
+    finally:
+        set_transport(previous)
+    assert [m["content"] for m in messages] == [str({"id": f"2105.{i:05d}"}) for i in range(4)]
+    assert len(stand_in_server.requests) == 1
+
+
+def test_get_article_batch_rejected_by_arxiv_fails_only_the_bad_id(stand_in_server):
+    from concurrent.futures import ThreadPoolExecutor
+    from urllib.parse import parse_qs, urlsplit
+    from requests import HTTPError
+
+    def by_id(request):
+        ids = parse_qs(urlsplit(request.path).query)["id_list"][0].split(",")
+        if "not-an-id" in ids:
+            return 400, "incorrect id format for not-an-id"
+        return 200, atom_feed([f"{i}v1" for i in ids])
+
+    stand_in_server.routes['/api/query'] = by_id
+    get_article = offline(GetArticle(), stand_in_server)
+    get_article.batch_window = 0.05
+
+    def lookup(arxiv_id):
+        try:
+            return get_article.fn(arxiv_id, output="records", fields=["id"])
+        except HTTPError as e:
+            return e.response.status_code
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        results = list(executor.map(lookup, ["2106.00001", "not-an-id", "2106.00002"]))
+    assert results == [{"id": "2106.00001"}, 400, {"id": "2106.00002"}]
+    first = parse_qs(urlsplit(stand_in_server.requests[0][1]).query)["id_list"][0].split(",")
+    assert sorted(first) == ["2106.00001", "2106.00002", "not-an-id"]
+    assert len(stand_in_server.requests) <= 5
+
+
+def test_search_answers_covered_queries_from_local_store(stand_in_server, tmp_path):
+    import json
+    import time
+    from gofannon.arxiv.rate_limit import RateLimiter
+    from gofannon.arxiv.store import MetadataStore
+
+    dump = [
+        {"id": "2101.00001", "title": "Attention is\\n all you need", "abstract": "We propose the transformer.",
+         "authors": "Ada Lovelace and Alan Turing", "categories": "cs.CL cs.LG",
+         "versions": [{"version": "v1", "created": "Mon, 4 Jan 2021 10:00:00 GMT"}]},
+        {"id": "2102.00002", "title": "Graph networks", "abstract": "Message passing on graphs.",
+         "authors_parsed": [["Hopper", "Grace", ""]], "categories": "cs.LG",
+         "versions": [{"version": "v1", "created": "Mon, 1 Feb 2021 10:00:00 GMT"},
+                      {"version": "v2", "created": "Mon, 8 Feb 2021 10:00:00 GMT"}]},
+        {"id": "2103.00003", "title": "Galaxy rotation", "abstract": "Dark matter.", "authors": "Vera Rubin",
+         "categories": "astro-ph.GA", "versions": [{"version": "v1", "created": "Mon, 1 Mar 2021 10:00:00 GMT"}]},
+    ]
+    store = MetadataStore(tmp_path / "metadata.sqlite")
+    assert store.import_dump([json.dumps(item) for item in dump], categories=["cs.LG"]) == 2
+
+    stand_in_server.routes['/api/query'] = lambda request: (200, atom_feed(["2104.00004v1"]))
+    search = offline(Search(), stand_in_server)
+    search.metadata_store = store
+
+    records = search.fn("cat:cs.LG AND ti:transformers OR", output="records", fields=["id"])  # OR is not supported locally
+    assert stand_in_server.requests and records == [{"id": "2104.00004"}]
+    stand_in_server.requests.clear()
+
+    began = time.perf_counter()
+    assert search.fn("cat:cs.LG", abs="transformer", output="records", fields=["id", "authors"]) == [
+        {"id": "2101.00001", "authors": ["Ada Lovelace", "Alan Turing"]}]
+    assert time.perf_counter() - began < 0.05
+    assert [r["id"] for r in search.fn("all:graph", cat="cs.LG", submittedDateFrom="20210201", output="records", fields=["id"])] == ["2102.00002"]
+    assert search.fn("cat:cs.LG", au="Hopper", output="records", fields=["version", "published"]) == [
+        {"version": "v2", "published": "2021-02-01T10:00:00Z"}]
+    assert stand_in_server.requests == []
+
+    search.fn("cat:astro-ph.GA", output="records", fields=["id"])  # not covered, goes live and stores the result
+    assert len(stand_in_server.requests) == 1 and len(store) == 3
+
+    stand_in_server.routes['/api/query'] = lambda request: (200, atom_feed(["2103.00003v1"], total=1, categories=["astro-ph.GA"]))
+    list(search.iter_results("cat:astro-ph.GA", rate_limiter=RateLimiter(0)))
+    stand_in_server.requests.clear()
+    assert [r["id"] for r in search.fn("cat:astro-ph.GA", output="records", fields=["id"])] == ["2103.00003"]
+    assert stand_in_server.requests == []
+
+    store.max_age = 0
+    search.fn("cat:cs.LG", output="records", fields=["id"])  # stale coverage falls back to the API
+    assert len(stand_in_server.requests) == 1
+
+
+def pdf_document(pages):
+    """A minimal PDF with one line of Helvetica text per page."""
+    count = len(pages)
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>",
+               b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(count))
+               + b"] /Count %d >>" % count,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    for i, text in enumerate(pages):
+        stream = b"BT /F1 12 Tf 72 720 Td (" + text.encode() + b") Tj ET"
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (5 + 2 * i))
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    data, offsets = b"%PDF-1.4\n", []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    data += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    return data + b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+
+
+def test_full_text_streams_to_disk_cache_once(stand_in_server, tmp_path):
+    import gzip
+    from gofannon.arxiv import GetFullText
+    from gofannon.base import HttpTransport
+
+    pdf = pdf_document(["Introduction to transformers", "Related work", "Experiments"])
+    source = "\\documentclass{article}\n% ü\n\\begin{document}Attention\\end{document}\n"
+    stand_in_server.routes['/api/query'] = lambda request: (200, atom_feed(["2101.00001v2"]))
+    stand_in_server.routes['/pdf/2101.00001v2'] = lambda request: (200, pdf, {"Content-Type": "application/pdf"})
+    stand_in_server.routes['/e-print/2101.00001v2'] = lambda request: (200, gzip.compress(source.encode()))
+
+    full_text = GetFullText()
+    full_text.transport = HttpTransport(host_overrides={"export.arxiv.org": stand_in_server.url,
+                                                         "arxiv.org": stand_in_server.url})
+    full_text.cache_dir = tmp_path
+    full_text.chunk_size = 64
+
+    head = full_text.fn("2101.00001", byte_start=0, byte_end=8)
+    assert head["version"] == "v2" and head["text"] == "%PDF-1.4" and head["size"] == len(pdf)
+    assert [path for _, path in stand_in_server.requests] == [
+        "/api/query?id_list=2101.00001&max_results=1", "/pdf/2101.00001v2"]
+    assert (tmp_path / "2101.00001" / "v2.pdf").read_bytes() == pdf
+    stand_in_server.requests.clear()
+
+    assert full_text.fn("2101.00001v2", byte_start=len(pdf) - 6)["text"] == "%%EOF\n"
+    assert full_text.fn("2101.00001", format="source", max_chars=32)["text"] == source.encode()[:32].decode()
+    assert stand_in_server.requests == [("GET", "/e-print/2101.00001v2")]
+    stand_in_server.requests.clear()
+
+    cached = tmp_path / "2101.00001" / "v2.pdf"
+    for damaged in (b"", pdf[:len(pdf) // 2]):  # empty or truncated files are fetched again
+        cached.write_bytes(damaged)
+        assert full_text.fn("2101.00001", byte_start=0, byte_end=8)["text"] == "%PDF-1.4"
+        assert cached.read_bytes() == pdf
+    assert stand_in_server.requests == [("GET", "/pdf/2101.00001v2")] * 2
+    stand_in_server.requests.clear()
+
+    pytest.importorskip("pypdf")
+    pages = full_text.fn("2101.00001", pages="2-3")
+    assert pages["page_count"] == 3 and pages["pages"] == [2, 3]
+    assert "Related work" in pages["text"] and "Experiments" in pages["text"]
+    assert "Introduction" not in pages["text"]
+    everything = full_text.fn("2101.00001", max_chars=20)
+    assert everything["pages"] == [1] and everything["truncated"]
+    assert stand_in_server.requests == []
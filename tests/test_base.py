@@ -0,0 +1,186 @@
+import asyncio
+import json
+
+import pytest
+from gofannon.base import WorkflowContext
+from gofannon.basic_math import Addition
+
+
+def test_aexecute_runs_sync_fn_in_executor():
+    context = WorkflowContext()
+    result = asyncio.run(Addition().aexecute(context, num1=2, num2=3))
+    assert result.success
+    assert result.output == 5
+    assert context.execution_log[-1]['tool'] == 'Addition'
+
+
+def test_aexecute_awaits_native_afn():
+    import threading
+    from gofannon.base import BaseTool
+
+    class NativeAsync(BaseTool):
+        definition = {"function": {"name": "native_async", "parameters": {}}}
+
+        def fn(self, value):
+            raise AssertionError("aexecute should not fall back to fn")
+
+        async def afn(self, value):
+            await asyncio.sleep(0)
+            return {"value": value, "thread": threading.current_thread()}
+
+    context = WorkflowContext()
+    result = asyncio.run(NativeAsync().aexecute(context, value=7))
+    assert result.success
+    assert result.output == {"value": 7, "thread": threading.current_thread()}  # ran on the loop, not an executor
+    assert context.execution_log[-1]['tool'] == 'NativeAsync'
+    assert context.execution_log[-1]['input'] == {"value": 7}
+
+
+def test_transport_routes_tools_to_stand_in_server(stand_in_server):
+    from gofannon.base import HttpTransport
+    from gofannon.nhsta import ComplaintsByVehicle
+
+    stand_in_server.routes['/complaints/complaintsByVehicle'] = lambda request: (200, '{"count": 1}')
+    tool = ComplaintsByVehicle()
+    tool.transport = HttpTransport(host_overrides={"api.nhtsa.gov": stand_in_server.url})
+    tool.cache_ttl = None
+
+    assert tool.fn("Acura", "ILX", "2022") == '{"count": 1}'
+    assert asyncio.run(tool.afn("Acura", "ILX", "2022")) == '{"count": 1}'
+    assert stand_in_server.requests == [('GET', '/complaints/complaintsByVehicle?make=Acura&model=ILX&modelYear=2022')] * 2
+
+
+def test_async_clients_close_with_their_event_loop(stand_in_server):
+    from gofannon.base import HttpTransport
+
+    stand_in_server.routes['/ping'] = lambda request: (200, 'pong')
+    transport = HttpTransport()
+    clients = []
+
+    async def ping():
+        response = await transport.aget(f"{stand_in_server.url}/ping")
+        clients.append(transport._async_clients[asyncio.get_running_loop()][0])
+        return response.text
+
+    assert asyncio.run(ping()) == 'pong'
+    assert asyncio.run(ping()) == 'pong'
+    assert len(clients) == 2 and all(client.is_closed for client in clients)
+    assert len(transport._async_clients) == 0
+
+    async def scoped():
+        async with transport:
+            await transport.aget(f"{stand_in_server.url}/ping")
+            client = next(iter(transport._async_clients.values()))[0]
+        return client.is_closed, len(transport._async_clients)
+    assert asyncio.run(scoped()) == (True, 0)
+
+
+def test_result_cache_hits_and_lru_eviction():
+    from gofannon.base import MemoryCache
+    from gofannon.basic_math import Multiplication
+
+    cache = MemoryCache(maxsize=2)
+    multiplication = Multiplication()
+    multiplication.result_cache = cache
+
+    assert multiplication.fn(2, 3) == 6
+    assert multiplication.fn(num1=2, num2=3) == 6
+    multiplication.fn(4, 5)
+    multiplication.fn(6, 7)
+
+    assert cache.stats() == {"hits": 1, "misses": 3, "evictions": 1, "expirations": 0, "size": 2}
+
+
+def test_result_cache_skips_errors_and_copies_results(stand_in_server):
+    from gofannon.base import HttpTransport, MemoryCache
+    from gofannon.nhsta import ComplaintsByVehicle
+    from requests import HTTPError
+
+    responses = [(503, 'Service Unavailable'), (200, '{"count": 1}')]
+    stand_in_server.routes['/complaints/complaintsByVehicle'] = lambda request: responses.pop(0)
+    tool = ComplaintsByVehicle()
+    tool.transport = HttpTransport(host_overrides={"api.nhtsa.gov": stand_in_server.url})
+    tool.result_cache = MemoryCache()
+
+    with pytest.raises(HTTPError):
+        tool.fn("Acura", "ILX", "2022")
+    assert tool.fn("Acura", "ILX", "2022") == '{"count": 1}'
+    assert tool.fn("Acura", "ILX", "2022") == '{"count": 1}'
+    assert len(stand_in_server.requests) == 2
+
+    cache = MemoryCache()
+    cache.store("records", [{"id": "2101.00001"}])
+    cache.lookup("records")[1].append({"id": "mutated"})
+    assert cache.lookup("records") == (True, [{"id": "2101.00001"}])
+
+
+def test_result_cache_keeps_differently_configured_instances_apart(stand_in_server):
+    import json
+    from gofannon.base import HttpTransport, MemoryCache
+    from gofannon.github import GetRepoContents
+
+    listing = [{"type": "file", "name": name, "path": name, "download_url": f"{stand_in_server.url}/raw/{name}"}
+               for name in ("app.py", "README.md")]
+    stand_in_server.routes['/repos/owner/repo/contents/'] = lambda request: (200, json.dumps(listing))
+    stand_in_server.routes['/raw/app.py'] = lambda request: (200, 'print("hi")')
+    stand_in_server.routes['/raw/README.md'] = lambda request: (200, '# Repo')
+    cache = MemoryCache()
+    tools = [GetRepoContents(api_key="token"), GetRepoContents(api_key="token")]
+    tools[1].eoi = {'md': 'markdown'}
+    for tool in tools:
+        tool.transport = HttpTransport(host_overrides={"api.github.com": stand_in_server.url})
+        tool.result_cache = cache
+
+    assert tools[0].fn("https://github.com/owner/repo", "") == 'app.py\n```python\nprint("hi")\n```\n\nREADME.md\n```markdown\n# Repo\n```'
+    assert tools[1].fn("https://github.com/owner/repo", "") == 'README.md\n```markdown\n# Repo\n```'
+    assert cache.stats()["misses"] == 2
+
+
+def test_write_tools_are_never_cached():
+    from gofannon.github import CommitFile, CreateIssue
+    assert CommitFile.cache_ttl is None
+    assert CreateIssue.cache_ttl is None
+
+
+def test_sqlite_cache_survives_restart(tmp_path):
+    from gofannon.base import SQLiteCache
+
+    cache = SQLiteCache(tmp_path / "results.sqlite", maxsize=10)
+    cache.store("key", {"answer": 42}, ttl=60)
+    cache.store("expired", "stale", ttl=-1)
+    cache.close()
+
+    reopened = SQLiteCache(tmp_path / "results.sqlite", maxsize=10)
+    assert reopened.lookup("key") == (True, {"answer": 42})
+    assert reopened.lookup("expired") == (False, None)
+    assert reopened.stats()["expirations"] == 1
+
+
+def test_journaled_checkpoints_append_deltas_and_rebuild(tmp_path):
+    context = WorkflowContext(journal_name="run", compact_every=3)
+    context.local_storage = tmp_path
+
+    context.data["query"] = "llamas"
+    context.save_checkpoint("start")
+    for step in range(4):
+        context.data[f"step_{step}"] = "x" * 100
+        context.log_execution(f"Tool{step}", 0.1, {}, step)
+        context.save_checkpoint(f"after_Tool{step}")
+
+    # Every record carries only its own step; compaction folded the first three
+    records = [json.loads(line) for line in context.journal_path.read_text().splitlines()]
+    assert [r["checkpoint"] for r in records] == ["after_Tool2", "after_Tool3"]
+    assert list(records[-1]["data"]) == ["step_3"]
+
+    with open(context.journal_path, "a") as f:
+        f.write('{"seq": 99, "checkpoint": "torn"')
+
+    restored = WorkflowContext(journal_name="run")
+    restored.local_storage = tmp_path
+    assert restored.load_journal() == "after_Tool3"
+    assert restored.data == context.data
+    assert [entry["tool"] for entry in restored.execution_log] == ["Tool0", "Tool1", "Tool2", "Tool3"]
+
+    restored.data["final"] = True
+    restored.save_checkpoint("final")
+    assert json.loads(restored.journal_path.read_text().splitlines()[-1])["data"] == {"final": True}
@@ -0,0 +1,185 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from gofannon.base import BaseTool, WorkflowContext
+from gofannon.basic_math import Addition, Multiplication
+from gofannon.orchestration import FunctionOrchestrator, ToolChain
+
+
+def _tool_call(call_id, name, **arguments):
+    return SimpleNamespace(
+        id=call_id,
+        function=SimpleNamespace(name=name, arguments=json.dumps(arguments))
+    )
+
+
+class FakeLLM:
+    """Returns the scripted messages in order, one per completion request."""
+
+    def __init__(self, scripted_messages):
+        self.scripted_messages = list(scripted_messages)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        msg = self.scripted_messages.pop(0)
+        return SimpleNamespace(choices=[SimpleNamespace(message=msg)])
+
+
+def test_parallel_tool_calls_keep_call_order(monkeypatch):
+    import threading
+    # Each call blocks until all three are running, so this only passes if they overlap
+    barrier = threading.Barrier(3, timeout=2)
+    for tool_class in (Addition, Multiplication):
+        def fn(self, num1, num2, _fn=tool_class.fn):
+            barrier.wait()
+            return _fn(self, num1, num2)
+        monkeypatch.setattr(tool_class, "fn", fn)
+        monkeypatch.setattr(tool_class, "cache_ttl", None)
+
+    tool_calls = [
+        _tool_call("call_1", "multiplication", num1=2, num2=3),
+        _tool_call("call_2", "addition", num1=2, num2=3),
+        _tool_call("call_3", "multiplication", num1=4, num2=5),
+    ]
+    llm = FakeLLM([
+        SimpleNamespace(content=None, tool_calls=tool_calls),
+        SimpleNamespace(content="done", tool_calls=None),
+    ])
+    orchestrator = FunctionOrchestrator(llm, max_concurrency=3)
+    result = orchestrator.execute_workflow("compute", model_name="fake")
+
+    tool_messages = [m for m in result["conversation"] if isinstance(m, dict) and m["role"] == "tool"]
+    assert [m["tool_call_id"] for m in tool_messages] == ["call_1", "call_2", "call_3"]
+    assert [m["content"] for m in tool_messages] == ["6", "5", "20"]
+    assert result["final_answer"] == "done"
+
+
+class CountingTool(BaseTool):
+    """ToolChain step whose parameters map argument names to context templates."""
+
+    def __init__(self, inputs, fail=False):
+        super().__init__()
+        self.inputs = inputs
+        self.fail = fail
+        self.calls = 0
+
+    @property
+    def definition(self):
+        return {"function": {"name": self.__class__.__name__.lower(), "parameters": self.inputs}}
+
+    def fn(self, **kwargs):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("step failed")
+        return sum(kwargs.values())
+
+
+class StepOne(CountingTool):
+    pass
+
+
+class StepTwo(CountingTool):
+    pass
+
+
+class StepThree(CountingTool):
+    pass
+
+
+def test_toolchain_resumes_after_failed_step(tmp_path):
+    context = WorkflowContext(journal_name="resume")
+    context.local_storage = tmp_path
+    one = StepOne({"a": "{{x}}", "b": "{{y}}"})
+    two = StepTwo({"a": "{{StepOne_output}}", "b": "{{y}}"})
+    three = StepThree({"a": "{{StepTwo_output}}", "b": "{{x}}"}, fail=True)
+
+    result = ToolChain([one, two, three], context).execute({"x": 1, "y": 2})
+    assert not result.success
+
+    three.fail = False
+    resumed_context = WorkflowContext(journal_name="resume")
+    resumed_context.local_storage = tmp_path
+    result = ToolChain([one, two, three], resumed_context).execute({"x": 1, "y": 2}, resume=True)
+
+    assert result.success
+    assert result.output["StepThree_output"] == 6
+    assert (one.calls, two.calls, three.calls) == (1, 1, 2)
+
+
+def test_toolchain_resume_needs_a_named_run(tmp_path):
+    other = WorkflowContext()
+    other.local_storage = tmp_path
+    other.data = {"StepOne_output": 99}
+    other.log_execution("StepOne", 0.0, {}, 99)
+    other.save_checkpoint("after_StepOne")  # the newest checkpoint belongs to another workflow
+
+    context = WorkflowContext()
+    context.local_storage = tmp_path
+    one = StepOne({"a": "{{x}}", "b": "{{y}}"})
+    with pytest.raises(ValueError):
+        ToolChain([one], context).execute({"x": 1, "y": 2}, resume=True)
+    assert one.calls == 0
+
+    result = ToolChain([one], context).execute({"x": 1, "y": 2}, resume=True, checkpoint="missing")
+    assert result.output["StepOne_output"] == 3 and one.calls == 1
+
+
+def test_toolchain_dag_runs_independent_steps_concurrently(tmp_path):
+    import threading
+    barrier = threading.Barrier(2, timeout=5)
+
+    class Left(CountingTool):
+        def fn(self, **kwargs):
+            barrier.wait()  # only passes if Right is running at the same time
+            return super().fn(**kwargs)
+
+    class Right(Left):
+        pass
+
+    class Merge(CountingTool):
+        pass
+
+    context = WorkflowContext(journal_name="dag")
+    context.local_storage = tmp_path
+    log_execution = context.log_execution
+    logging_threads = set()
+
+    def record_thread(**kwargs):
+        logging_threads.add(threading.current_thread())
+        log_execution(**kwargs)
+
+    context.log_execution = record_thread
+    merge = Merge({"a": "{{Left_output}}", "b": "{{Right_output}}"})
+    chain = ToolChain([merge, Left({"a": "{{x}}"}), Right({"a": "{{y}}"})], context, max_workers=2)
+
+    assert chain._dependency_graph() == {0: {1, 2}, 1: set(), 2: set()}
+    result = chain.execute({"x": 1, "y": 2}, mode="dag")
+    assert result.success
+    assert result.output["Merge_output"] == 3
+    assert logging_threads == {threading.current_thread()}
+
+    resumed = WorkflowContext(journal_name="dag")
+    resumed.local_storage = tmp_path
+    resumed.load_checkpoint()
+    assert sorted(entry["tool"] for entry in resumed.execution_log) == ["Left", "Merge", "Right"]
+
+
+def test_toolchain_dag_accepts_a_single_dependency_as_a_string():
+    chain = ToolChain([StepOne({"a": "{{x}}"}), StepTwo({"a": "{{x}}"})], WorkflowContext(),
+                      depends_on={"StepTwo": "StepOne"})
+    assert chain._dependency_graph() == {0: set(), 1: {0}}
+
+
+def test_toolchain_dag_failure_names_the_step():
+    chain = ToolChain([StepOne({"a": "{{x}}"}), StepTwo({"a": "{{x}}"}, fail=True)], WorkflowContext())
+    result = chain.execute({"x": 1}, mode="dag")
+    assert not result.success
+    assert result.error == "StepTwo failed: step failed"
+
+
+def test_toolchain_dag_rejects_cycles():
+    chain = ToolChain([StepOne({"a": "{{StepTwo_output}}"}), StepTwo({})], WorkflowContext(),
+                      depends_on={"StepTwo": ["StepOne"]})
+    with pytest.raises(ValueError):
+        chain.execute(mode="dag")
@@ -1,5 +1,8 @@
 import pytest
 from os import getenv
+import threading
+from types import SimpleNamespace
+from openai.types.chat import ChatCompletion
 from gofannon.reasoning import HierarchicalCoT, SequentialCoT, TreeOfThought
 depth_chart = [
     {'model_name' : "meta-llama/Meta-Llama-3.1-8B-Instruct-Turbo",
@@ -33,4 +36,512 @@ def test_hierarchical_cot():
 def test_tree_of_thought():
     tree_of_thought = TreeOfThought(depth_chart= depth_chart)
     result = tree_of_thought.fn("Explain quantum computing", branches=3)
-    assert result is not None
\ No newline at end of file
+    assert result is not None
+
+def test_reasoning_tools_share_cached_clients():
+    from gofannon.reasoning.base import client_cache
+    chart = [{**level, 'api_key': 'test-key'} for level in depth_chart]
+    client_cache.clear()
+
+    tree_of_thought = TreeOfThought(depth_chart= chart)
+    hierarchical_cot = HierarchicalCoT(depth_chart= chart)
+
+    assert tree_of_thought.create_openai_like_client(0) is hierarchical_cot.create_openai_like_client(2)
+    assert len(client_cache) == 1
+
+
+
+class FakeClient:
+    """Stands in for an OpenAI client; ``reply(messages)`` returns the completion text (or a list of choices)."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = []
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model, messages, **kwargs):
+        with self._lock:
+            self.calls.append({"model": model, "messages": messages, **kwargs})
+        content = self.reply(messages)
+        contents = content if isinstance(content, list) else [content]  # a list becomes several choices
+        return ChatCompletion.model_validate({
+            "id": "fake", "object": "chat.completion", "created": 0, "model": model,
+            "choices": [{"index": i, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": text}} for i, text in enumerate(contents)]
+        })
+
+
+def offline(tool, reply):
+    client = FakeClient(reply)
+    tool.create_openai_like_client = lambda level: client
+    return client
+
+
+def test_response_cache_skips_repeated_prompts():
+    from gofannon.base import MemoryCache
+    tree_of_thought = TreeOfThought(depth_chart= depth_chart)
+    tree_of_thought.response_cache = MemoryCache()
+    client = offline(tree_of_thought, lambda messages: "cached")
+    messages = [{"role": "user", "content": "Explain quantum computing"}]
+
+    tree_of_thought.get_response(0, messages)
+    assert tree_of_thought.response_cache_stats == {}  # temperature > 0 is not cached by default
+
+    tree_of_thought.cache_sampled_responses = True
+    tree_of_thought.get_response(0, messages)
+    response = tree_of_thought.get_response(0, [{"role": "user", "content": "Explain quantum computing  "}])
+
+    assert response.choices[0].message.content == "cached"
+    assert len(client.calls) == 2
+    assert tree_of_thought.response_cache_stats == {0: {"hits": 1, "misses": 1}}
+
+
+def test_tree_of_thought_evaluates_branches_concurrently():
+    import json
+    import time
+    chart = [{**level, 'max_concurrency': 3} for level in depth_chart]
+    tree_of_thought = TreeOfThought(depth_chart= chart)
+    in_flight = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def reply(messages):
+        prompt = messages[-1]["content"]
+        if prompt.startswith("Generate"):
+            return json.dumps({"branches": ["slow", "fast", "medium"]})
+        with lock:
+            in_flight["now"] += 1
+            in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        time.sleep(0.05)
+        with lock:
+            in_flight["now"] -= 1
+        scores = {"slow": 3, "fast": 9, "medium": 6}
+        score = next(value for name, value in scores.items() if f"'{name}'" in prompt)
+        return json.dumps({"score": score, "strengths": [], "weaknesses": [], "next_steps": []})
+
+    offline(tree_of_thought, reply)
+    result = tree_of_thought.fn("Explain quantum computing", branches=3, evaluation_depth=1)
+
+    assert in_flight["peak"] == 3
+    assert [b["description"] for b in result["all_branches"]] == ["fast", "medium", "slow"]
+    assert result["best_branch"]["score"] == 9
+
+
+def test_hierarchical_cot_expands_siblings_in_order():
+    import json
+    import random
+    import time
+    hierarchical_cot = HierarchicalCoT(depth_chart= depth_chart)
+
+    def reply(messages):
+        prompt = messages[-1]["content"]
+        if prompt.startswith("Organize"):
+            return json.dumps({"title": "Root", "sections": [{"title": f"S{i}"} for i in range(4)]})
+        time.sleep(random.uniform(0, 0.02))  # finish out of order
+        title = prompt.split("Section to expand: ")[1].split()[0]
+        if "'content' field" in prompt:
+            return json.dumps({"content": f"about {title}"})
+        if title == "S2":
+            return "not json"
+        return json.dumps({"title": title, "sections": [{"title": f"{title}.{j}"} for j in range(3)]})
+
+    offline(hierarchical_cot, reply)
+    result = hierarchical_cot.fn("Explain quantum computing", depth=3)
+
+    assert [s["title"] for s in result["sections"]] == ["S0", "S1", "S2", "S3"]
+    assert [s["content"] for s in result["sections"][3]["sections"]] == ["about S3.0", "about S3.1", "about S3.2"]
+    assert result["sections"][2] == {"title": "S2"}
+    assert [e["section_index"] for e in hierarchical_cot.error_context] == [2]
+
+
+def test_hierarchical_cot_streams_markdown_in_document_order():
+    import json
+    import time
+    hierarchical_cot = HierarchicalCoT(depth_chart= depth_chart)
+
+    def reply(messages):
+        prompt = messages[-1]["content"]
+        if prompt.startswith("Organize"):
+            return json.dumps({"title": "Root", "sections": [{"title": "A"}, {"title": "B"}]})
+        title = prompt.split("Section to expand: ")[1].split()[0]
+        if title.startswith("A"):
+            time.sleep(0.05)  # A's subtree finishes after B's
+        if "'content' field" in prompt:
+            return json.dumps({"content": f"about {title}"})
+        return json.dumps({"title": title, "sections": [{"title": f"{title}.1"}, {"title": f"{title}.2"}]})
+
+    offline(hierarchical_cot, reply)
+    events = list(hierarchical_cot.iter_fn("Explain quantum computing", depth=3))
+
+    assert events[0]["type"] == "outline"
+    assert events[-1]["type"] == "result"
+    assert ("section", ("B", "B.2")) in {(e["type"], tuple(e["path"][1:])) for e in events}
+    assert [e["index_path"] for e in events[1:-1]].index((1,)) < [e["index_path"] for e in events[1:-1]].index((0,))
+
+    chunks = list(hierarchical_cot.iter_markdown(iter(events)))
+    assert chunks[0] == "# Root\n\n"
+    assert "".join(chunks) == hierarchical_cot.to_markdown(events[-1]["node"])
+
+
+def test_hierarchical_cot_streams_failures_visibly():
+    import json
+    hierarchical_cot = HierarchicalCoT(depth_chart= depth_chart)
+
+    def reply(messages):
+        prompt = messages[-1]["content"]
+        if prompt.startswith("Organize"):
+            return json.dumps({"title": "Root", "sections": [{"title": "A"}, {"title": "B"}]})
+        title = prompt.split("Section to expand: ")[1].split()[0]
+        return "not json" if title == "A" else json.dumps({"content": f"about {title}"})
+
+    offline(hierarchical_cot, reply)
+    markdown = "".join(hierarchical_cot.iter_markdown(hierarchical_cot.iter_fn("Explain quantum computing")))
+    assert markdown == "# Root\n\n## A\n\n*Expansion failed*\n\n## B\n\nabout B\n\n"
+
+    hierarchical_cot.depth_chart = depth_chart[:1]  # too shallow for depth 2, so the run fails
+    markdown = "".join(hierarchical_cot.iter_markdown(hierarchical_cot.iter_fn("Explain quantum computing")))
+    assert markdown.startswith("*Requested depth 2 exceeds")
+
+
+def test_hierarchical_cot_batches_each_level():
+    import json
+    hierarchical_cot = HierarchicalCoT(depth_chart= depth_chart, expansion="batched")
+
+    def reply(messages):
+        prompt = messages[-1]["content"]
+        if prompt.startswith("Organize"):
+            return json.dumps({"title": "Root", "sections": [{"title": f"S{i}"} for i in range(3)]})
+        if prompt.startswith("Expand this section"):  # per-section fallback
+            return json.dumps({"title": "S1", "sections": [{"title": "S1.0"}]})
+        lines = [line for line in prompt.splitlines() if line.startswith("[")]
+        if "'content' field" in prompt:
+            return json.dumps({str(n): {"content": f"about {line.split(' -> ')[-1]}"}
+                               for n, line in enumerate(lines)})
+        return json.dumps({str(n): {"title": f"S{n}", "sections": [{"title": f"S{n}.0"}]}
+                           for n in range(len(lines)) if n != 1})  # S1 is missing from the batch
+
+    client = offline(hierarchical_cot, reply)
+    result = hierarchical_cot.fn("Explain quantum computing", depth=3)
+
+    assert len(client.calls) == 1 + 1 + 1 + 1  # outline, level 1, S1 fallback, level 2
+    assert [s["sections"][0]["content"] for s in result["sections"]] == ["about S0.0", "about S1.0", "about S2.0"]
+    assert hierarchical_cot.error_context == []
+
+
+def test_tree_of_thought_beam_search_prunes_and_stops_early():
+    import json
+    tree_of_thought = TreeOfThought(depth_chart= depth_chart)
+    scores = {"a": 2, "b": 7, "c": 5, "d": 1, "b1": 6, "c1": 4, "b11": 9, "b12": 8}
+    analysed = []
+
+    def reply(messages):
+        prompt = messages[-1]["content"]
+        if prompt.startswith("Generate"):
+            return json.dumps({"branches": ["a", "b", "c", "d"]})
+        if prompt.startswith("Refine"):
+            name = prompt.split("Approach: ")[1].split()[0]
+            return json.dumps({"branches": [f"{name}1", f"{name}2"]})
+        if prompt.startswith("Perform deep analysis"):
+            analysed.append(prompt)
+            return json.dumps({"examples": []})
+        name = prompt.split("'description': '")[1].split("'")[0]
+        return json.dumps({"score": scores[name], "strengths": [name], "weaknesses": [], "next_steps": []})
+
+    client = offline(tree_of_thought, reply)
+    result = tree_of_thought.fn("Explain quantum computing", branches=2, evaluation_depth=3,
+                                search="beam", beam_width=2)
+
+    assert result["best_branch"]["description"] == "b11"
+    # Each level after the first scores only beam_width candidates, split across the survivors
+    assert {b["description"] for b in result["all_branches"]} == {"a", "b", "c", "d", "b1", "c1", "b11", "b12"}
+    assert len(analysed) == 2 and all("b1" in p for p in analysed)  # only the final beam
+    assert result["search"] == {"mode": "beam", "calls": len(client.calls), "stopped": "depth", "levels": 3}
+    assert len(client.calls) == 14 <= 1 + 4 + (3 - 1) * 2 * 2 + 2
+
+    client = offline(tree_of_thought, reply)
+    result = tree_of_thought.fn("Explain quantum computing", branches=2, evaluation_depth=3,
+                                search="beam", beam_width=2, score_threshold=7)
+    assert result["best_branch"]["description"] == "b"
+    assert result["search"]["stopped"] == "threshold"
+
+    client = offline(tree_of_thought, reply)
+    result = tree_of_thought.fn("Explain quantum computing", branches=2, evaluation_depth=3,
+                                search="beam", beam_width=2, max_calls=6)
+    assert len(client.calls) == 6
+    assert result["search"]["stopped"] == "budget"
+
+
+def test_tree_of_thought_comparative_scoring_falls_back_per_branch():
+    import json
+    tree_of_thought = TreeOfThought(depth_chart= depth_chart, evaluation="comparative")
+
+    def reply(messages):
+        prompt = messages[-1]["content"]
+        if prompt.startswith("Generate"):
+            return json.dumps({"branches": ["a", "b", "c"]})
+        if prompt.startswith("Compare"):
+            return json.dumps({"evaluations": [
+                {"index": 2, "score": 8, "strengths": ["c"], "weaknesses": [], "next_steps": []},
+                {"index": 0, "score": 4, "strengths": ["a"], "weaknesses": [], "next_steps": []},
+                {"index": 1, "score": "high"},  # malformed, scored on its own
+            ]})
+        return json.dumps({"score": 6, "strengths": ["b"], "weaknesses": [], "next_steps": []})
+
+    client = offline(tree_of_thought, reply)
+    result = tree_of_thought.fn("Explain quantum computing", branches=3, evaluation_depth=1)
+
+    assert len(client.calls) == 3  # generation, comparison, one fallback
+    assert [(b["description"], b["score"]) for b in result["all_branches"]] == [("c", 8), ("b", 6), ("a", 4)]
+    assert result["best_branch"]["strengths"] == ["c"]
+
+
+def test_tree_of_thought_comparative_scoring_distrusts_bad_indexes():
+    import json
+    tree_of_thought = TreeOfThought(depth_chart= depth_chart, evaluation="comparative")
+    evaluations = [{"index": i + 1, "score": s} for i, s in enumerate([3, 9, 5])]  # 1-based
+
+    def reply(messages):
+        prompt = messages[-1]["content"]
+        if prompt.startswith("Generate"):
+            return json.dumps({"branches": ["a", "b", "c"]})
+        if prompt.startswith("Compare"):
+            return json.dumps({"evaluations": evaluations})
+        return json.dumps({"score": 1})
+
+    client = offline(tree_of_thought, reply)
+    result = tree_of_thought.fn("Explain quantum computing", branches=3, evaluation_depth=1)
+    assert len(client.calls) == 2  # matched by position, no fallbacks
+    assert [(b["description"], b["score"]) for b in result["all_branches"]] == [("b", 9), ("c", 5), ("a", 3)]
+    assert "index" not in result["best_branch"]
+
+    evaluations[:] = [{"index": 2, "score": 9}, {"index": 3, "score": 5}]  # neither valid indexes nor one per branch
+    client.calls.clear()
+    result = tree_of_thought.fn("Explain quantum computing", branches=3, evaluation_depth=1)
+    assert len(client.calls) == 2 + 3
+    assert [b["score"] for b in result["all_branches"]] == [1, 1, 1]
+
+
+def test_tree_of_thought_samples_branches_with_n():
+    import json
+    tree_of_thought = TreeOfThought(depth_chart= depth_chart, generation="sampled")
+
+    def reply(messages):
+        prompt = messages[-1]["content"]
+        if prompt.startswith("Propose"):
+            return ["Use superconducting qubits with error correction.",
+                    "Use superconducting qubits, with error correction!",
+                    "Explain with a photonic interferometer analogy."]
+        return json.dumps({"score": 5, "strengths": [], "weaknesses": [], "next_steps": []})
+
+    client = offline(tree_of_thought, reply)
+    result = tree_of_thought.fn("Explain quantum computing", branches=3, evaluation_depth=1)
+
+    assert client.calls[0]["n"] == 3
+    assert len(client.calls) == 1 + 2  # one sampled request, then two unique branches scored
+    assert [b["description"] for b in result["all_branches"]] == [
+        "Use superconducting qubits with error correction.",
+        "Explain with a photonic interferometer analogy."]
+    assert "n" not in client.calls[1]
+
+
+def test_sequential_cot_bounds_context():
+    import json
+    chart = [*depth_chart[:2], {**depth_chart[2], 'prompt_appendix': 'Synthesize.'}]
+
+    def reply(messages):
+        prompt = messages[-1]["content"]
+        if "return a series of" in prompt:
+            return json.dumps({"steps": [f"step {i}" for i in range(6)]})
+        if prompt.startswith("Update the running summary"):
+            return "summary of " + ", ".join(line for line in prompt.splitlines() if line.startswith("Step:"))
+        return f"output of {prompt}" + " detail" * 50
+
+    full = SequentialCoT(depth_chart= chart)
+    client = offline(full, reply)
+    full.fn("Explain quantum computing", steps=6)
+    assert [len(call["messages"]) for call in client.calls[1:]] == [3, 5, 7, 9, 11, 13, 15]
+
+    windowed = SequentialCoT(depth_chart= chart, context="summary", window=2)
+    client = offline(windowed, reply)
+    windowed.fn("Explain quantum computing", steps=6)
+    step_calls = [call for call in client.calls if call["messages"][-1]["content"].startswith("step")]
+    assert [len(call["messages"]) for call in step_calls] == [3, 5, 7, 9, 9, 9]
+    assert "summary of Step: step 0" in step_calls[3]["messages"][2]["content"]
+    assert [u["stage"] for u in windowed.token_usage].count("summary") == 4  # before steps 4-6 and the synthesis
+    assert windowed.get_debug_info()["token_usage"][-1]["stage"] == "synthesis"
+    assert sum(u["prompt_tokens"] for u in windowed.token_usage if u["stage"].startswith("step")) < \
+        sum(u["prompt_tokens"] for u in full.token_usage if u["stage"].startswith("step"))
+
+    stable = SequentialCoT(depth_chart= chart, context="window", window=2, prefix_stable=True)
+    client = offline(stable, reply)
+    stable.fn("Explain quantum computing", steps=6)
+    step_messages = [call["messages"] for call in client.calls[1:7]]
+    extends_previous = [later[:len(earlier) - 1] == earlier[:-1] for earlier, later in zip(step_messages, step_messages[1:])]
+    assert extends_previous == [True, True, True, False, True]
+
+
+def test_sequential_cot_runs_independent_steps_concurrently():
+    import json
+    chart = [depth_chart[0], {**depth_chart[1], 'max_concurrency': 2}, {**depth_chart[2], 'prompt_appendix': 'Synthesize.'}]
+    barrier = threading.Barrier(2, timeout=5)
+
+    def reply(messages):
+        prompt = messages[-1]["content"]
+        if "return a plan of" in prompt:
+            return json.dumps({"steps": [
+                {"id": 1, "prompt": "research A", "depends_on": []},
+                {"id": 2, "prompt": "research B", "depends_on": []},
+                {"id": 3, "prompt": "compare", "depends_on": [1, 2]},
+            ]})
+        if prompt.startswith("research"):
+            barrier.wait()  # only passes if both research steps are in flight together
+        return f"result of {prompt}"
+
+    sequential_cot = SequentialCoT(depth_chart= chart, mode="dag")
+    client = offline(sequential_cot, reply)
+    response = sequential_cot.fn("Compare A and B", steps=3)
+
+    compare = next(call for call in client.calls if call["messages"][-1]["content"] == "compare")
+    assert [m["content"] for m in compare["messages"][2:]] == [
+        "research A", "result of research A", "research B", "result of research B", "compare"]
+    assert response.choices[0].message.content == "result of Synthesize."
+    assert len(client.calls[-1]["messages"]) == 2 + 6 + 1
+
+    # Models don't always return depends_on as a list of ids
+    prompts, deps = SequentialCoT._plan_graph([
+        {"id": 1, "prompt": "a", "depends_on": None},
+        {"id": "2", "prompt": "b", "depends_on": 1},
+        {"id": 3, "prompt": "c", "depends_on": "1, 2"},
+        {"id": 4, "prompt": "d", "depends_on": {"step": 9}},
+    ])
+    assert deps == {0: set(), 1: {0}, 2: {0, 1}, 3: set()}
+
+
+def test_cascade_escalates_only_rejected_replies():
+    import json
+    from gofannon.reasoning.base import CascadePolicy
+    chart = [{**level, 'cascade': [{'model_name': 'small-model'}]} for level in depth_chart]
+    tree_of_thought = TreeOfThought(depth_chart= chart)
+    tree_of_thought.cascade_policy = CascadePolicy(min_score=5)
+
+    def small(messages):
+        prompt = messages[-1]["content"]
+        if prompt.startswith("Generate"):
+            return json.dumps({"branches": ["a", "b", "c"]})
+        if "'a'" in prompt:
+            return "not json"
+        return json.dumps({"score": 9 if "'b'" in prompt else 2, "strengths": [], "weaknesses": [], "next_steps": []})
+
+    large = offline(tree_of_thought, lambda messages: json.dumps({"score": 7, "strengths": [], "weaknesses": [], "next_steps": []}))
+    cheap = FakeClient(small)
+    tree_of_thought.create_cascade_client = lambda level, config: cheap
+    result = tree_of_thought.fn("Explain quantum computing", branches=3, evaluation_depth=1)
+
+    assert [(b["description"], b["score"]) for b in result["all_branches"]] == [("b", 9), ("a", 7), ("c", 7)]
+    assert len(cheap.calls) == 4 and len(large.calls) == 2
+    stats = tree_of_thought.get_debug_info()["cascade_stats"]
+    assert stats["initial_branch_generation"]["escalations"] == 0
+    assert stats["branch_evaluation"]["calls"] == 3
+    assert stats["branch_evaluation"]["reasons"] == {"json_error": 1, "low_score": 1}
+
+
+def test_endpoint_pool_ejects_failing_endpoint_and_readmits_after_probe(stand_in_server):
+    import json
+    from openai import BadRequestError
+    from gofannon.reasoning.balancer import Endpoint, EndpointPool
+    healthy = {"b": False}
+
+    def completion(name):
+        def handler(req):
+            if name == "b" and not healthy["b"]:
+                return 500, json.dumps({"error": {"message": "down"}}), {"Content-Type": "application/json"}
+            model = json.loads(req.body)["model"]
+            return 200, json.dumps({
+                "id": name, "object": "chat.completion", "created": 0, "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": f"from {name}"}}]
+            }), {"Content-Type": "application/json"}
+        return handler
+
+    def models(req):
+        status = 200 if healthy["b"] else 503
+        return status, json.dumps({"object": "list", "data": []}), {"Content-Type": "application/json"}
+
+    for name in ("a", "b"):
+        stand_in_server.routes[f"/{name}/v1/chat/completions"] = completion(name)
+    stand_in_server.routes["/b/v1/models"] = models
+
+    chart = [{'model_name': "stand-in", 'api_key': "test-key", 'temperature': 0,
+              'endpoints': [{'base_url': f"{stand_in_server.url}/a/v1"}, {'base_url': f"{stand_in_server.url}/b/v1"}],
+              'balancer': "round_robin", 'max_failures': 1, 'eject_seconds': 0.2}]
+    tree_of_thought = TreeOfThought(depth_chart= chart)
+    messages = [{"role": "user", "content": "hi"}]
+
+    replies = [tree_of_thought.get_response(0, messages).choices[0].message.content for _ in range(4)]
+    assert replies == ["from a"] * 4  # b fails over to a once, then is ejected
+    pool = tree_of_thought.endpoint_pool(0)
+    assert [e["ejected"] for e in pool.stats()] == [False, True]
+
+    import time
+
+    def wait_for(condition):
+        deadline = time.monotonic() + 2
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return condition()
+
+    def probes():
+        return sum(path == "/b/v1/models" for _, path in stand_in_server.requests)
+
+    time.sleep(0.25)
+    tree_of_thought.get_response(0, messages)  # starts a probe that fails, so b stays out
+    assert wait_for(lambda: probes() == 1)
+    time.sleep(0.05)
+    assert pool.stats()[1]["ejected"]
+
+    healthy["b"] = True
+    time.sleep(0.25)
+    tree_of_thought.get_response(0, messages)  # served by a while the probe runs
+    assert wait_for(lambda: not pool.stats()[1]["ejected"])
+    replies = [tree_of_thought.get_response(0, messages).choices[0].message.content for _ in range(2)]
+    assert sorted(replies) == ["from a", "from b"]
+
+    # A slow probe runs in the background instead of holding up acquire
+    def slow_probe(endpoint):
+        time.sleep(1)
+        return True
+    down, up = Endpoint("down", None), Endpoint("up", None)
+    pool = EndpointPool([down, up], max_failures=1, probe=slow_probe)
+    pool.release(pool.acquire(exclude=[up]), failed=True)
+    down.ejected_until = time.monotonic()
+    started = time.monotonic()
+    assert pool.acquire() is up
+    assert time.monotonic() - started < 0.5
+    assert down.ejected
+    assert wait_for(lambda: not down.ejected)
+
+    # Least-outstanding and EWMA routing choose by load and latency
+    slow, fast = Endpoint("slow", None), Endpoint("fast", None)
+    pool = EndpointPool([slow, fast], policy="ewma")
+    pool.release(pool.acquire(), latency=1.0)
+    pool.release(pool.acquire(), latency=0.1)
+    assert pool.acquire() is fast
+    pool = EndpointPool([Endpoint("slow", None), Endpoint("fast", None)], policy="least_outstanding")
+    assert {pool.acquire().base_url, pool.acquire().base_url} == {"slow", "fast"}
+
+    # A request error (400) neither clears nor extends an endpoint's failure streak
+    stand_in_server.routes["/a/v1/chat/completions"] = lambda req: (
+        400, json.dumps({"error": {"message": "bad request"}}), {"Content-Type": "application/json"})
+    chart = [{**chart[0], 'balancer': "least_outstanding", 'max_failures': 3,
+              'endpoints': [{'base_url': f"{stand_in_server.url}/a/v1"}]}]
+    tree_of_thought = TreeOfThought(depth_chart=chart)
+    pool = tree_of_thought.endpoint_pool(0)
+    pool.endpoints[0].failures = 2
+    with pytest.raises(BadRequestError):
+        tree_of_thought.get_response(0, messages)
+    assert pool.endpoints[0].failures == 2 and pool.endpoints[0].outstanding == 0
+
+    with pytest.raises(ValueError, match="endpoints"):
+        tree_of_thought.create_openai_like_client(0)
+    with pytest.raises(ValueError, match="base_url"):
+        tree_of_thought.create_cascade_client(0, {'model_name': "small"})